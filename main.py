@@ -1,10 +1,16 @@
 """Entry point for the MCP Query Execution server."""
 
+import asyncio
 import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import uvloop
+except ImportError:  # Optional; the default asyncio loop is used without it
+    uvloop = None
+
 # Add src to path for development
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
@@ -21,6 +27,10 @@ def main():
         load_dotenv(env_path)
         MCP_PORT = int(os.getenv('MCP_PORT', 8000))
 
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("Using uvloop event loop")
+
         # Create and run MCP server
         server = create_mcp_server()
         logger.info("Starting MCP server with HTTP transport")
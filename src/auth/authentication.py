@@ -71,7 +71,7 @@ class OpenbridgeAuthMiddleware(Middleware):
         # Priority 2: Fall back to server's refresh token
         if not jwt_token:
             try:
-                jwt_token = self._auth.get_jwt()
+                jwt_token = await self._auth.get_jwt_async()
                 logger.debug("Using server refresh token to generate JWT")
             except Exception:
                 # Debug level: Some MCP endpoints (health, list tools) don't require auth
@@ -2,15 +2,27 @@
 
 from __future__ import annotations
 
+import atexit
 import os
 import time
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
+import httpx
 import jwt
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.utils.http import get_http_client
 
 DEFAULT_CONNECT_TIMEOUT = 10
+# Minted JWTs are reused until this many seconds before they expire.
+TOKEN_EXPIRY_BUFFER_SECONDS = 300
+
+_SESSION: Optional[requests.Session] = None
 
 
 class AuthenticationError(RuntimeError):
@@ -23,14 +35,38 @@ def get_api_timeout() -> Tuple[int, int]:
     return DEFAULT_CONNECT_TIMEOUT, read_timeout
 
 
+def _get_session() -> requests.Session:
+    """Return the session used for refresh-token exchanges, keeping its connection alive."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            # Exchanging a refresh token only mints a JWT, so retrying the POST is safe.
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        _SESSION.mount("https://", HTTPAdapter(pool_maxsize=16, max_retries=retries))
+        atexit.register(_SESSION.close)
+    return _SESSION
+
+
+@lru_cache(maxsize=256)
+def decode_unverified_claims(token: str) -> Mapping[str, Any]:
+    """Return a JWT's claims without verifying its signature, memoized per token."""
+    return MappingProxyType(jwt.decode(token, options={"verify_signature": False}))
+
+
 @dataclass
 class _CachedToken:
     token: str
     expires: float
 
     def is_valid(self) -> bool:
-        # Keep a five-minute buffer to avoid using an about-to-expire token.
-        return time.time() < (self.expires - 300)
+        # Keep a buffer to avoid using an about-to-expire token.
+        return time.time() < (self.expires - TOKEN_EXPIRY_BUFFER_SECONDS)
 
 
 class OpenbridgeAuth:
@@ -46,31 +82,61 @@ class OpenbridgeAuth:
 
     def get_jwt(self) -> str:
         """Return a cached JWT, refreshing when needed."""
+        cached = self._cached_jwt()
+        if cached:
+            return cached
+        return self._refresh()
+
+    async def get_jwt_async(self) -> str:
+        """Return a cached JWT, refreshing without blocking the event loop."""
+        cached = self._cached_jwt()
+        if cached:
+            return cached
+        return await self._refresh_async()
+
+    def _cached_jwt(self) -> Optional[str]:
+        """Return the cached JWT if it is still valid."""
         if not self.refresh_token:
             raise AuthenticationError(
                 "OPENBRIDGE_REFRESH_TOKEN not available for JWT generation"
             )
         if self._cache and self._cache.is_valid():
             return self._cache.token
-        return self._refresh()
+        return None
+
+    def _refresh_request(self) -> Dict[str, Any]:
+        """Return the URL and body for exchanging the refresh token."""
+        return {
+            "url": f"{self.auth_base_url}/auth/api/ref",
+            "json": {
+                "data": {
+                    "type": "APIAuth",
+                    "attributes": {"refresh_token": self.refresh_token},
+                }
+            },
+            "headers": {"Content-Type": "application/json"},
+        }
 
     def _refresh(self) -> str:
         """Exchange the refresh token for a JWT."""
         try:
-            response = requests.post(
-                f"{self.auth_base_url}/auth/api/ref",
-                json={
-                    "data": {
-                        "type": "APIAuth",
-                        "attributes": {"refresh_token": self.refresh_token},
-                    }
-                },
-                timeout=get_api_timeout(),
-                headers={"Content-Type": "application/json"},
-            )
+            response = _get_session().post(**self._refresh_request(), timeout=get_api_timeout())
+        except Exception as exc:
+            raise AuthenticationError("Openbridge auth request failed") from exc
+        return self._store_token(response)
+
+    async def _refresh_async(self) -> str:
+        """Exchange the refresh token for a JWT over the shared async client."""
+        connect_timeout, read_timeout = get_api_timeout()
+        try:
+            client = await get_http_client(timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+            response = await client.post(**self._refresh_request())
         except Exception as exc:
             raise AuthenticationError("Openbridge auth request failed") from exc
+        return self._store_token(response)
 
+    def _store_token(self, response: Any) -> str:
+        """Extract the JWT from an exchange response and cache it until expiry."""
         try:
             response.raise_for_status()
             payload = response.json()
@@ -86,7 +152,7 @@ class OpenbridgeAuth:
                 "Openbridge auth response did not include a token"
             ) from exc
 
-        decoded = jwt.decode(jwt_token, options={"verify_signature": False})
+        decoded = decode_unverified_claims(jwt_token)
         expires_at = float(
             decoded.get("expires_at") or decoded.get("exp") or (time.time() + 3600)
         )
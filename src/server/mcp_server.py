@@ -76,6 +76,10 @@ def create_mcp_server() -> FastMCP:
         name='get_amazon_advertising_profiles',
         description='List the Amazon Advertising profiles for a given remote identity ID. Returns a list of profiles.',
     )(service_tools.get_amazon_advertising_profiles)
+    mcp.tool(
+        name='get_amazon_advertising_profiles_many',
+        description='List the Amazon Advertising profiles for several remote identity IDs concurrently. Returns profiles keyed by remote identity ID.',
+    )(service_tools.get_amazon_advertising_profiles_many)
     mcp.tool(
         name='get_table_schema',
         description='Get the schema/rules for a given table name from the rules API. Use table names from list_product_tables output. Returns the schema if found.',
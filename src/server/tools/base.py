@@ -1,15 +1,51 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
-from urllib.parse import urljoin, urlparse
+import asyncio
+import atexit
+import itertools
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+
+import httpx
+import orjson
+import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from src.auth.authentication import JWT_CONTEXT_ATTR, JWT_PUBLIC_ATTR
 from src.auth.simple import AuthenticationError, get_api_timeout, get_auth
+from src.utils.http import get_http_client
 from src.utils.logging import get_logger
 from src.utils.security import ValidationError, validate_url
 
 logger = get_logger("base_tools")
 
+HTTP_POOL_CONNECTIONS = 8
+HTTP_POOL_MAXSIZE = 32
+PAGINATION_MAX_WORKERS = 8
+LARGE_RESPONSE_BYTES = 1 << 20
+HTTP_ASYNC_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+_HTTP_SESSION: Optional[requests.Session] = None
+_IN_FLIGHT: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+# Validated GET responses, keyed by (url, params, Authorization) so tenants never share entries.
+HTTP_CACHE_MAX_AGE = 3600
+_HTTP_CACHE: TTLCache = TTLCache(maxsize=256, ttl=HTTP_CACHE_MAX_AGE)
+_HTTP_CACHE_LOCK = threading.Lock()
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+T = TypeVar("T")
+
 
 def _get_context_jwt(ctx) -> Optional[str]:
     """Best-effort retrieval of a primed JWT from the FastMCP context."""
@@ -66,6 +102,182 @@ def get_auth_headers(ctx=None) -> Dict[str, str]:
         ) from exc
 
 
+def _build_http_session() -> requests.Session:
+    """Create a session with pooled keep-alive connections and idempotent retries."""
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        respect_retry_after_header=True,
+        # urllib3's default allowed_methods leave POST out; creating history jobs is not idempotent.
+        # Hand the final response back to the caller instead of raising.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json", "User-Agent": "Openbridge-MCP/1.0"})
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared ``requests.Session`` used for outbound API calls.
+
+    Reusing one session keeps TCP/TLS connections to the Openbridge and Amazon
+    hosts alive between tool calls instead of handshaking on every request.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        _HTTP_SESSION = _build_http_session()
+        atexit.register(_HTTP_SESSION.close)
+    return _HTTP_SESSION
+
+
+async def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async client for coroutine tools.
+
+    The client comes from the shared HTTP client manager, so it is pooled and
+    closed with the other managed clients. HTTP/2 is negotiated by default
+    (``HTTP_ENABLE_HTTP2=false`` opts out); the manager falls back to HTTP/1.1
+    when the ``h2`` package is missing.
+    """
+    connect_timeout, read_timeout = get_api_timeout()
+    return await get_http_client(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=HTTP_ASYNC_LIMITS,
+        http2=os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true",
+    )
+
+
+async def singleflight(key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+    """Run ``factory()`` once per ``key`` while a call for that key is in flight.
+
+    Concurrent callers with the same key await the first caller's task instead
+    of issuing their own downstream request. The shared result is returned as
+    is, so callers that hand it out should copy mutable values.
+    """
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _IN_FLIGHT[key] = task
+
+        def _forget(done: "asyncio.Future[Any]") -> None:
+            if _IN_FLIGHT.get(key) is done:
+                del _IN_FLIGHT[key]
+
+        task.add_done_callback(_forget)
+    # Shield so one cancelled caller does not cancel the request for the others.
+    return await asyncio.shield(task)
+
+
+def decode_json(response: requests.Response) -> Any:
+    """Decode a JSON response body directly from its raw bytes.
+
+    Openbridge APIs always answer with UTF-8 JSON, so handing
+    ``response.content`` to orjson skips the text decoding and charset
+    detection that ``response.json()`` performs. Decode failures surface as
+    ``requests.exceptions.JSONDecodeError`` to keep existing handlers intact.
+    """
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as exc:
+        raise requests.exceptions.JSONDecodeError(exc.msg, exc.doc, exc.pos) from exc
+
+
+async def decode_json_async(response: Any) -> Any:
+    """Decode a JSON response, moving large bodies off the event loop.
+
+    Query results can run to several megabytes; parsing them inline would stall
+    every other coroutine on the server for the duration.
+    """
+    if len(response.content) < LARGE_RESPONSE_BYTES:
+        return decode_json(response)
+    return await asyncio.to_thread(decode_json, response)
+
+
+@dataclass
+class _CachedJSON:
+    payload: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+
+
+def _cache_entry(response: requests.Response, payload: Any) -> Optional[_CachedJSON]:
+    """Build a cache entry from the response's caching headers, if it allows one."""
+    cache_control = (response.headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    match = MAX_AGE_PATTERN.search(cache_control)
+    max_age = 0 if match is None or "no-cache" in cache_control else int(match.group(1))
+    if not (etag or last_modified or max_age):
+        return None
+    return _CachedJSON(payload, etag, last_modified, time.monotonic() + min(max_age, HTTP_CACHE_MAX_AGE))
+
+
+def get_json_revalidated(
+    session: requests.Session,
+    url: str,
+    *,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Any]:
+    """GET a JSON resource, honouring the origin's HTTP caching headers.
+
+    Responses that are still fresh per ``Cache-Control: max-age`` are served
+    from memory; otherwise a cached ``ETag``/``Last-Modified`` is sent as
+    ``If-None-Match``/``If-Modified-Since`` so an unchanged resource costs a
+    304. A cached copy is also served if the request fails outright. Returns
+    ``(status_code, payload)`` where ``payload`` is ``None`` for non-200s.
+    """
+    key = (url, tuple(sorted((params or {}).items())), headers.get("Authorization"))
+    with _HTTP_CACHE_LOCK:
+        cached = _HTTP_CACHE.get(key)
+    if cached is not None and cached.fresh_until > time.monotonic():
+        return 200, cached.payload
+
+    request_headers = dict(headers)
+    if cached is not None:
+        if cached.etag:
+            request_headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            request_headers["If-Modified-Since"] = cached.last_modified
+    try:
+        response = session.get(url, params=params, headers=request_headers, timeout=get_api_timeout())
+    except requests.exceptions.RequestException as exc:
+        if cached is None:
+            raise
+        logger.warning("Serving cached response for %s after request failure: %s", url, exc)
+        return 200, cached.payload
+
+    if response.status_code == 304 and cached is not None:
+        payload = cached.payload
+    elif response.status_code == 200:
+        payload = decode_json(response)
+    else:
+        return response.status_code, None
+
+    entry = _cache_entry(response, payload)
+    with _HTTP_CACHE_LOCK:
+        if entry is None:
+            _HTTP_CACHE.pop(key, None)
+        else:
+            _HTTP_CACHE[key] = entry
+    return 200, payload
+
+
+@lru_cache(maxsize=256)
+def _url_host(url: str) -> str:
+    """Return the network location of ``url``; base URLs and page links repeat across calls."""
+    return urlparse(url).netloc
+
+
 def safe_pagination_url(next_url: Optional[str], base_url: str) -> Optional[str]:
     """Ensure pagination links stay on the expected host."""
     if not next_url:
@@ -78,8 +290,8 @@ def safe_pagination_url(next_url: Optional[str], base_url: str) -> Optional[str]
         logger.warning("SSRF blocked: invalid pagination URL (%s)", exc)
         return None
 
-    expected_host = urlparse(base_url).netloc
-    actual_host = urlparse(candidate).netloc
+    expected_host = _url_host(base_url)
+    actual_host = _url_host(candidate)
 
     if actual_host and expected_host and actual_host != expected_host:
         logger.warning(
@@ -92,4 +304,152 @@ def safe_pagination_url(next_url: Optional[str], base_url: str) -> Optional[str]
     return candidate
 
 
-__all__ = ["get_auth_headers", "get_api_timeout", "safe_pagination_url", "AuthenticationError"]
+def _total_pages(payload: Dict[str, Any]) -> Optional[int]:
+    """Return the page count advertised by a JSON:API listing, if any."""
+    pages = ((payload.get("meta") or {}).get("pagination") or {}).get("pages")
+    if pages is None:
+        last_url = (payload.get("links") or {}).get("last")
+        if last_url:
+            pages = dict(parse_qsl(urlparse(last_url).query)).get("page")
+    try:
+        return int(pages) if pages is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _page_number(url: Optional[str], page_param: str) -> Optional[str]:
+    """Return the value of ``page_param`` in ``url``'s query string, if present."""
+    if not url:
+        return None
+    return dict(parse_qsl(urlparse(url).query)).get(page_param)
+
+
+def _page_url(url: str, page_param: str, page: int) -> str:
+    """Return ``url`` with its ``page_param`` query parameter set to ``page``."""
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query[page_param] = str(page)
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def _worker_session_factory(session: requests.Session) -> Callable[[], requests.Session]:
+    """Return a callable giving each pagination worker thread its own session.
+
+    ``requests.Session`` is not thread-safe (cookies and adapter mounts are
+    shared state), so workers get a session of their own that reuses the
+    shared session's adapters, i.e. its connection pools and retry policy,
+    and its default headers. Other clients are used as they are.
+    """
+    if not isinstance(session, requests.Session):
+        return lambda: session
+    local = threading.local()
+
+    def worker_session() -> requests.Session:
+        worker = getattr(local, "session", None)
+        if worker is None:
+            worker = requests.Session()
+            worker.headers = session.headers.copy()
+            worker.adapters = session.adapters.copy()
+            local.session = worker
+        return worker
+
+    return worker_session
+
+
+def iter_json_pages(
+    session: requests.Session,
+    first_url: str,
+    *,
+    base_url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+    max_pages: Optional[int] = None,
+    page_param: Optional[str] = None,
+) -> Iterator[Tuple[requests.Response, Optional[Dict[str, Any]]]]:
+    """Yield ``(response, payload)`` for each page of a JSON:API listing, in order.
+
+    By default ``links.next`` is followed, prefetching the next page while the
+    caller processes the current one. Listings that number their pages with a
+    ``page_param`` query parameter may pass it; when the first page advertises
+    the total page count (``meta.pagination.pages`` or a ``links.last`` URL) and
+    its ``links.next`` agrees with that numbering, up to PAGINATION_MAX_WORKERS
+    later pages are requested concurrently, submitted as the caller consumes
+    them. ``payload`` is ``None`` for a non-200 response, which ends the
+    iteration. Requests not yet started are cancelled when iteration stops early.
+    """
+    timeout = get_api_timeout()
+    worker_session = _worker_session_factory(session)
+
+    def fetch(url: str, http: Any) -> Tuple[requests.Response, Optional[Dict[str, Any]]]:
+        response = http.get(url, headers=headers, params=params, timeout=timeout)
+        payload = decode_json(response) if response.status_code == 200 else None
+        return response, payload
+
+    def fetch_in_worker(url: str) -> Tuple[requests.Response, Optional[Dict[str, Any]]]:
+        return fetch(url, worker_session())
+
+    response, payload = fetch(first_url, session)
+    if payload is None:
+        yield response, payload
+        return
+
+    total_pages = None
+    if page_param is not None and _page_number(first_url, page_param) == "1":
+        total_pages = _total_pages(payload)
+        next_page = _page_number((payload.get("links") or {}).get("next"), page_param)
+        if next_page is not None and next_page != "2":
+            # The server's own next link does not follow the page numbering.
+            total_pages = None
+    if total_pages is not None and max_pages is not None:
+        total_pages = min(total_pages, max_pages)
+
+    executor = ThreadPoolExecutor(max_workers=PAGINATION_MAX_WORKERS)
+    try:
+        if total_pages is not None and total_pages > 1:
+            page_urls = iter([_page_url(first_url, page_param, page) for page in range(2, total_pages + 1)])
+            window = deque(
+                executor.submit(fetch_in_worker, url)
+                for url in itertools.islice(page_urls, PAGINATION_MAX_WORKERS)
+            )
+            yield response, payload
+            while window:
+                response, payload = window.popleft().result()
+                yield response, payload
+                if payload is None:
+                    return
+                url = next(page_urls, None)
+                if url is not None:
+                    window.append(executor.submit(fetch_in_worker, url))
+            return
+
+        page_count = 1
+        while True:
+            next_url = None
+            if max_pages is None or page_count < max_pages:
+                next_url = safe_pagination_url(payload.get("links", {}).get("next"), base_url)
+            pending = executor.submit(fetch_in_worker, next_url) if next_url else None
+            yield response, payload
+            if pending is None:
+                return
+            response, payload = pending.result()
+            page_count += 1
+            if payload is None:
+                yield response, payload
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = [
+    "get_auth_headers",
+    "get_api_timeout",
+    "get_async_client",
+    "decode_json",
+    "decode_json_async",
+    "get_http_session",
+    "get_json_revalidated",
+    "iter_json_pages",
+    "safe_pagination_url",
+    "singleflight",
+    "AuthenticationError",
+]
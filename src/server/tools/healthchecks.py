@@ -2,11 +2,11 @@ import os
 from typing import Any, Dict, List, Optional
 
 import jwt
-import requests
 from fastmcp.server.context import Context
 
+from src.auth.simple import decode_unverified_claims
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers, safe_pagination_url
+from .base import decode_json, get_api_timeout, get_auth_headers, get_http_session, safe_pagination_url
 
 HC_BASE_URL = os.getenv(
     'HEALTHCHECKS_API_BASE_URL', 
@@ -45,10 +45,7 @@ def get_healthchecks(
         return []
 
     try:
-        jwt_payload = jwt.decode(
-            jwt_token,
-            options={"verify_signature": False, "verify_aud": False, "verify_iss": False}
-        )
+        jwt_payload = decode_unverified_claims(jwt_token)
     except jwt.exceptions.DecodeError as e:
         logger.error("Failed to decode JWT token: %s", e)
         return []
@@ -71,19 +68,20 @@ def get_healthchecks(
     healthchecks = []
     while next_page:
         params["page"] = next_page
-        response = requests.get(
+        response = get_http_session().get(
             f"{HC_BASE_URL}/{account_id}",
             headers=headers,
             params=params,
             timeout=get_api_timeout(),
         )
         if response.status_code == 200:
-            hcs = response.json().get("results", [])
+            payload = decode_json(response)
+            hcs = payload.get("results", [])
             healthchecks.extend(hcs)
             logger.debug(f"Fetched {len(hcs)} healthchecks from page {next_page}")
             # Paginate if necessary
             next_link = safe_pagination_url(
-                response.json().get('links', {}).get('next'),
+                payload.get('links', {}).get('next'),
                 HC_BASE_URL,
             )
             if next_link:
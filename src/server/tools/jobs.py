@@ -2,15 +2,17 @@ import os
 from datetime import datetime as dt, timedelta as td
 from typing import Any, Dict, List, Optional
 
+import orjson
 import requests
 from fastmcp.server.context import Context
 
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers
+from .base import decode_json, get_api_timeout, get_auth_headers, get_http_session
 
 logger = get_logger("jobs")
 
 JOBS_API_BASE_URL = os.getenv('JOBS_API_BASE_URL', 'https://service.api.openbridge.io/service/jobs/production/jobs')
+HISTORY_API_BASE_URL = os.getenv('HISTORY_API_BASE_URL')
 
 
 def get_jobs(
@@ -44,14 +46,14 @@ def get_jobs(
         params['is_primary'] = is_primary.lower()
 
     try:
-        response = requests.get(
+        response = get_http_session().get(
             f"{JOBS_API_BASE_URL}/jobs",
             headers=headers,
             params=params,
             timeout=get_api_timeout(),
         )
         response.raise_for_status()
-        return response.json().get('data', [])
+        return decode_json(response).get('data', [])
     except requests.RequestException as e:
         logger.error(f"Error fetching jobs: {e}")
         return []
@@ -76,7 +78,8 @@ def create_job(
     Returns:
         Optional[List[Dict[Any, Any]]]: The created job data if successful. If unsuccessful, returns a dict with an "errors" key.
     """
-    headers = get_auth_headers(ctx)
+    headers = {**get_auth_headers(ctx), "Content-Type": "application/json"}
+    history_url = f"{HISTORY_API_BASE_URL}/history/{subscription_id}"
     job_data = []
     for stage_id in stage_ids:
         payload = {
@@ -94,14 +97,14 @@ def create_job(
 
         response = None
         try:
-            response = requests.post(
-                f"{os.getenv('HISTORY_API_BASE_URL')}/history/{subscription_id}",
+            response = get_http_session().post(
+                history_url,
                 headers=headers,
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=get_api_timeout(),
             )
             response.raise_for_status()
-            job_data.append(response.json().get('data', {}).get('attributes', {}))
+            job_data.append(decode_json(response).get('data', {}).get('attributes', {}))
             logger.debug("Created one-off job: %s", job_data)
         except requests.RequestException as e:
             error_detail = response.text if response is not None else str(e)
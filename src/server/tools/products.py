@@ -1,12 +1,13 @@
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
+import orjson
 import requests
 from fastmcp.server.context import Context
 
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers
+from .base import decode_json, get_api_timeout, get_auth_headers
 
 logger = get_logger("products")
 
@@ -36,7 +37,7 @@ def get_product_stage_ids(
         timeout=get_api_timeout(),
     )
     if response.status_code == 200:
-        product_stage_ids = response.json().get("data", [])
+        product_stage_ids = decode_json(response).get("data", [])
         logger.debug(f"Retrieved product stage IDs for {product_id}: {product_stage_ids}")
         return product_stage_ids
     else:
@@ -60,7 +61,7 @@ def _fetch_all_products(headers: Dict[str, str]) -> List[dict]:
                 timeout=get_api_timeout(),
             )
             response.raise_for_status()
-            data = response.json()
+            data = decode_json(response)
 
             products = data.get("data", [])
             if products:
@@ -93,6 +94,8 @@ def _fuzzy_match_products(products: List[dict], query: str) -> List[dict]:
     """
     query_lower = query.lower().strip()
     query_words = query_lower.split()
+    # Include if at least 30% of query words matched (or exact match)
+    min_score = max(30, len(query_words) * 3)  # At least 30 or 30% of words
     scored_matches = []
 
     for product in products:
@@ -120,8 +123,6 @@ def _fuzzy_match_products(products: List[dict], query: str) -> List[dict]:
         # Use best score
         best_score = max(name_score, worker_score)
 
-        # Include if at least 30% of query words matched (or exact match)
-        min_score = max(30, len(query_words) * 3)  # At least 30 or 30% of words
         if best_score >= min_score:
             scored_matches.append({
                 "score": best_score,
@@ -155,7 +156,7 @@ def _fetch_subscription_stage_ids(subscription_id: int, headers: Dict[str, str])
             timeout=get_api_timeout(),
         )
         response.raise_for_status()
-        data = response.json()
+        data = decode_json(response)
 
         spm_data = data.get("data", [])
         if spm_data:
@@ -166,10 +167,10 @@ def _fetch_subscription_stage_ids(subscription_id: int, headers: Dict[str, str])
             # Parse stage_ids from JSON string
             stage_ids_str = attributes.get("data_value", "[]")
             try:
-                stage_ids = json.loads(stage_ids_str)
+                stage_ids = orjson.loads(stage_ids_str)
                 logger.debug(f"Found stage_ids {stage_ids} for subscription {subscription_id}")
                 return product_id, stage_ids
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.warning(f"Failed to parse stage_ids for subscription {subscription_id}")
 
     except requests.exceptions.RequestException as exc:
@@ -183,7 +184,7 @@ def _fetch_subscription_stage_ids(subscription_id: int, headers: Dict[str, str])
             timeout=get_api_timeout(),
         )
         response.raise_for_status()
-        data = response.json()
+        data = decode_json(response)
 
         product_id = data.get("data", {}).get("attributes", {}).get("product_id")
         if product_id:
@@ -217,17 +218,10 @@ def _fetch_product_payloads(
             timeout=get_api_timeout(),
         )
         response.raise_for_status()
-        data = response.json()
+        data = decode_json(response)
 
         payloads = data.get("data", [])
 
-        # Filter by stage_ids if provided
-        if stage_ids is not None:
-            payloads = [
-                p for p in payloads
-                if p.get("attributes", {}).get("stage_id") in stage_ids
-            ]
-
         # Format results
         results = []
         for payload in payloads:
@@ -238,6 +232,10 @@ def _fetch_product_payloads(
                 "id": int(payload.get("id")),
             })
 
+        # Filter by stage_ids if provided
+        if stage_ids is not None:
+            results = _filter_payloads_by_stage_ids(results, stage_ids)
+
         logger.debug(f"Found {len(results)} payloads for product {product_id}")
         return results
 
@@ -246,6 +244,11 @@ def _fetch_product_payloads(
         return []
 
 
+def _filter_payloads_by_stage_ids(payloads: List[dict], stage_ids: List[int]) -> List[dict]:
+    """Keep only formatted payloads whose stage_id is enabled for a subscription."""
+    return [p for p in payloads if p["stage_id"] in stage_ids]
+
+
 # Public MCP tools
 
 def search_products(
@@ -318,23 +321,31 @@ def list_product_tables(
     headers = get_auth_headers(ctx)
 
     try:
-        # If subscription_id provided, get stage_ids to filter payloads
-        stage_ids = None
-        if subscription_id is not None:
-            try:
-                sub_product_id, stage_ids = _fetch_subscription_stage_ids(subscription_id, headers)
-                # Verify product_id matches subscription's product
-                if sub_product_id != product_id:
-                    logger.warning(
-                        f"Product ID {product_id} does not match subscription {subscription_id}'s "
-                        f"product ID {sub_product_id}. Using subscription's product ID."
-                    )
-                    product_id = sub_product_id
-            except ValueError as exc:
-                return [{"error": str(exc)}]
-
-        # Fetch payloads (tables)
-        payloads = _fetch_product_payloads(product_id, stage_ids, headers)
+        if subscription_id is None:
+            payloads = _fetch_product_payloads(product_id, None, headers)
+        else:
+            # Fetch the requested product's payloads optimistically while the
+            # subscription's stage_ids are resolved; callers usually pass the
+            # subscription's own product_id, saving a full round trip.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                payloads_future = executor.submit(_fetch_product_payloads, product_id, None, headers)
+                stage_ids_future = executor.submit(_fetch_subscription_stage_ids, subscription_id, headers)
+                try:
+                    sub_product_id, stage_ids = stage_ids_future.result()
+                except ValueError as exc:
+                    return [{"error": str(exc)}]
+                payloads = payloads_future.result()
+
+            # Verify product_id matches subscription's product
+            if sub_product_id == product_id:
+                payloads = _filter_payloads_by_stage_ids(payloads, stage_ids)
+            else:
+                logger.warning(
+                    f"Product ID {product_id} does not match subscription {subscription_id}'s "
+                    f"product ID {sub_product_id}. Using subscription's product ID."
+                )
+                product_id = sub_product_id
+                payloads = _fetch_product_payloads(product_id, stage_ids, headers)
 
         if not payloads:
             logger.info(f"No tables found for product {product_id}")
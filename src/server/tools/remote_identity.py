@@ -1,16 +1,21 @@
 import os
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 
-import requests
+from cachetools import TTLCache
 from fastmcp.server.context import Context
 
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers, safe_pagination_url
+from .base import decode_json, get_async_client, get_auth_headers, get_http_session, iter_json_pages, singleflight
 
 logger = get_logger("remote_identities")
 
 REMOTE_IDENTITY_API_BASE_URL = os.getenv("REMOTE_IDENTITY_API_BASE_URL", 'https://remote-identity.api.openbridge.io')
 
+# Remote identity records rarely change; keyed by (id, Authorization) so tenants never share entries.
+_REMOTE_IDENTITY_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_REMOTE_IDENTITY_CACHE_LOCK = threading.Lock()
+
 def get_remote_identities(
     remote_identity_type_id: Optional[str] = None,
     ctx: Optional[Context] = None,
@@ -31,28 +36,24 @@ def get_remote_identities(
 
     if remote_identity_type_id:
         params['type'] = remote_identity_type_id
-    next_page_url = f"{REMOTE_IDENTITY_API_BASE_URL}/ri?page=1"
-    while next_page_url:
-        response = requests.get(
-            next_page_url,
-            params=params,
-            headers=headers,
-            timeout=get_api_timeout(),
-        )
-        if response.status_code == 200:
-            ris = response.json().get("data", [])
-            remote_identities.extend(ris)
-            logger.debug(f"Retrieved {len(ris)} remote identities")
-            next_page_url = safe_pagination_url(
-                response.json().get('links', {}).get('next', None),
-                REMOTE_IDENTITY_API_BASE_URL,
-            )
-        else:
-            logger.warning(f"Failed to retrieve remote identities: {response.status_code}")
+    pages = iter_json_pages(
+        get_http_session(),
+        f"{REMOTE_IDENTITY_API_BASE_URL}/ri?page=1",
+        base_url=REMOTE_IDENTITY_API_BASE_URL,
+        headers=headers,
+        params=params,
+        page_param="page",
+    )
+    for response, payload in pages:
+        if payload is None:
+            logger.warning("Failed to retrieve remote identities: %s", response.status_code)
             break
+        ris = payload.get("data", [])
+        remote_identities.extend(ris)
+        logger.debug("Retrieved %s remote identities", len(ris))
     return remote_identities
 
-def get_remote_identity_by_id(
+async def get_remote_identity_by_id(
     remote_identity_id: str,
     ctx: Optional[Context] = None,
 ) -> dict:
@@ -64,19 +65,42 @@ def get_remote_identity_by_id(
     Returns:
         dict: The remote identity data if found, or an error message otherwise.
     """
-    headers = get_auth_headers(ctx)
-    response = requests.get(
+    return await resolve_remote_identity(remote_identity_id, get_auth_headers(ctx))
+
+
+async def resolve_remote_identity(remote_identity_id: str, headers: Dict[str, str]) -> dict:
+    """Look up a remote identity with already resolved auth headers.
+
+    Shared by tools that chain several lookups for one caller, so the
+    Authorization header is derived once per tool call.
+    """
+    cache_key = (str(remote_identity_id), headers.get("Authorization"))
+    with _REMOTE_IDENTITY_CACHE_LOCK:
+        cached = _REMOTE_IDENTITY_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached remote identity %s", remote_identity_id)
+        return dict(cached)
+    remote_identity = await singleflight(
+        ("remote_identity",) + cache_key,
+        lambda: _fetch_remote_identity(remote_identity_id, headers, cache_key),
+    )
+    return dict(remote_identity)
+
+
+async def _fetch_remote_identity(remote_identity_id: str, headers: dict, cache_key: tuple) -> dict:
+    """Fetch a remote identity from the API and cache it on success."""
+    client = await get_async_client()
+    response = await client.get(
         f"{REMOTE_IDENTITY_API_BASE_URL}/sri/{remote_identity_id}",
         headers=headers,
-        timeout=get_api_timeout(),
     )
     if response.status_code == 200:
-        remote_identity = response.json().get("data", {})
-        logger.debug(f"Retrieved remote identity {remote_identity_id}: {remote_identity}")
-        for key in remote_identity['attributes']:
-            remote_identity[key] = remote_identity['attributes'][key]
-        del remote_identity['attributes']
+        remote_identity = decode_json(response).get("data", {})
+        logger.debug("Retrieved remote identity %s: %s", remote_identity_id, remote_identity)
+        remote_identity.update(remote_identity.pop('attributes', {}))
+        with _REMOTE_IDENTITY_CACHE_LOCK:
+            _REMOTE_IDENTITY_CACHE[cache_key] = remote_identity
         return remote_identity
     else:
-        logger.warning(f"Failed to retrieve remote identity {remote_identity_id}: {response.status_code}")
+        logger.warning("Failed to retrieve remote identity %s: %s", remote_identity_id, response.status_code)
         return {"error": f"Remote identity {remote_identity_id} not found."}
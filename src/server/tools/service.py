@@ -1,18 +1,27 @@
-import json
+import asyncio
+import copy
+import hashlib
+import itertools
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+import orjson
+from cachetools import TTLCache
 from fastmcp.server.context import Context
 
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers
-from .remote_identity import get_remote_identity_by_id
+from .base import decode_json, decode_json_async, get_async_client, get_auth_headers, get_http_session, get_json_revalidated, singleflight
+from .remote_identity import resolve_remote_identity
 import os
 
 logger = get_logger("service")
 
 SERVICE_API_BASE_URL = os.getenv("SERVICE_API_BASE_URL", 'https://service.api.openbridge.io')
+QUERY_ENDPOINT = f"{SERVICE_API_BASE_URL}/service/query/production/query"
+RULES_SEARCH_ENDPOINT = f"{SERVICE_API_BASE_URL}/service/rules/prod/v1/rules/search"
+
+AMZADV_MAX_CONCURRENCY = 16
 
 AMZADV_REGIONAL_BASE_URLS = {
     "na": "https://advertising-api.amazon.com",
@@ -20,6 +29,10 @@ AMZADV_REGIONAL_BASE_URLS = {
     "fe": "https://advertising-api-fe.amazon.com",
 }
 
+# Amazon access tokens live ~60 minutes; keep them for 50, per (identity, Authorization).
+_AMAZON_TOKEN_CACHE: TTLCache = TTLCache(maxsize=512, ttl=3000)
+_AMAZON_TOKEN_CACHE_LOCK = threading.Lock()
+
 MUTATING_KEYWORDS = (
     "insert",
     "update",
@@ -31,18 +44,56 @@ MUTATING_KEYWORDS = (
     "merge",
 )
 
-LIMIT_PATTERN = re.compile(r"limit\s+\d", re.IGNORECASE)
+# Number of validate_query calls that skipped the LLM because heuristics already denied.
+_SAMPLING_SKIPPED = itertools.count(1)
 
+# Validation decisions for repeated queries (dashboards, retries) when LLM sampling is enabled.
+_VALIDATION_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=600)
 
-def _find_mutating_keywords(query: str) -> List[str]:
-    """Return mutating keywords detected in the SQL string."""
-    query_lower = query.lower()
-    return [kw for kw in MUTATING_KEYWORDS if re.search(rf"\b{kw}\b", query_lower)]
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Single pass over the SQL string: mutating keywords, a LIMIT clause and SELECT *.
+SQL_HEURISTICS_PATTERN = re.compile(
+    r"\b(?P<mutating>" + "|".join(MUTATING_KEYWORDS) + r")\b"
+    r"|(?P<limit>limit\s+\d)"
+    r"|(?P<select_star>select\s+\*)",
+    re.IGNORECASE,
+)
 
 
-def _has_limit_clause(query: str) -> bool:
-    """Determine whether the SQL string contains a LIMIT clause."""
-    return bool(LIMIT_PATTERN.search(query))
+def _scan_query(query: str) -> Tuple[List[str], bool, bool]:
+    """Return ``(mutating_keywords, has_limit, select_star)`` for the SQL string."""
+    found = set()
+    has_limit = False
+    select_star = False
+    for match in SQL_HEURISTICS_PATTERN.finditer(query):
+        kind = match.lastgroup
+        if kind == "mutating":
+            found.add(match.group(kind).lower())
+        elif kind == "limit":
+            has_limit = True
+        else:
+            select_star = True
+        if has_limit and select_star and len(found) == len(MUTATING_KEYWORDS):
+            # Nothing left to learn from the rest of a large query.
+            break
+    mutating_keywords = [kw for kw in MUTATING_KEYWORDS if kw in found]
+    return mutating_keywords, has_limit, select_star
+
+
+def _validation_cache_key(query_trimmed: str, key_name: str, allow_unbounded: bool) -> str:
+    """Hash the whitespace-normalized query with the inputs that affect the decision."""
+    normalized = WHITESPACE_PATTERN.sub(" ", query_trimmed)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(orjson.dumps([normalized, key_name, allow_unbounded]))
+    return digest.hexdigest()
+
+
+def _copy_validation(result: Dict[str, Any], query_trimmed: str) -> Dict[str, Any]:
+    """Return a private copy of a shared validation result for this caller's query text."""
+    result = copy.deepcopy(result)
+    result["query"] = query_trimmed
+    return result
 
 
 async def validate_query(
@@ -72,9 +123,46 @@ async def validate_query(
         raise ValueError("Sampling API key required: set FASTMCP_SAMPLING_API_KEY or OPENAI_API_KEY")
 
     query_trimmed = query.strip()
-    mutating_keywords = _find_mutating_keywords(query_trimmed)
-    has_limit = _has_limit_clause(query_trimmed)
-    select_star = bool(re.search(r"select\s+\*", query_trimmed, re.IGNORECASE))
+    enable_llm = os.getenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "false").lower() == "true"
+    if not enable_llm:
+        return await _assess_query(query_trimmed, key_name, allow_unbounded, ctx, enable_llm)
+
+    cache_key = _validation_cache_key(query_trimmed, key_name, allow_unbounded)
+    cached = _VALIDATION_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached validate_query decision")
+        return _copy_validation(cached, query_trimmed)
+
+    result = await singleflight(
+        ("validate_query", cache_key),
+        lambda: _assess_and_cache_query(cache_key, query_trimmed, key_name, allow_unbounded, ctx),
+    )
+    return _copy_validation(result, query_trimmed)
+
+
+async def _assess_and_cache_query(
+    cache_key: str,
+    query_trimmed: str,
+    key_name: str,
+    allow_unbounded: bool,
+    ctx: Context,
+) -> Dict[str, Any]:
+    """Validate with LLM sampling and cache the decision unless sampling errored."""
+    result = await _assess_query(query_trimmed, key_name, allow_unbounded, ctx, True)
+    if "error" not in result["sampling"]:
+        _VALIDATION_CACHE[cache_key] = copy.deepcopy(result)
+    return result
+
+
+async def _assess_query(
+    query_trimmed: str,
+    key_name: str,
+    allow_unbounded: bool,
+    ctx: Context,
+    enable_llm: bool,
+) -> Dict[str, Any]:
+    """Run the SQL heuristics and, when enabled, the LLM sampling check."""
+    mutating_keywords, has_limit, select_star = _scan_query(query_trimmed)
 
     heuristics: Dict[str, Any] = {
         "read_only": not mutating_keywords,
@@ -104,12 +192,20 @@ async def validate_query(
     if not key_name:
         heuristics["warnings"].append("No key_name provided.")
 
-    enable_llm = os.getenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "false").lower() == "true"
-
     sampling_feedback: Dict[str, Any] = {"supported": False, "details": None}
     sampling_allows = heuristics["read_only"]
 
-    if enable_llm:
+    # Mutating keywords or a missing LIMIT without override deny regardless of the LLM verdict.
+    hard_deny = bool(mutating_keywords) or (not has_limit and not allow_unbounded)
+
+    if enable_llm and hard_deny:
+        sampling_feedback["skipped"] = "heuristic_deny"
+        sampling_allows = False
+        logger.info(
+            "Skipping LLM validation; heuristics already deny (skipped=%d)",
+            next(_SAMPLING_SKIPPED),
+        )
+    elif enable_llm:
         logger.warning("Sending SQL to OpenAI for validation (see SECURITY.md)")
         system_prompt = (
             "You evaluate SQL queries for a read-only analytics service. "
@@ -133,13 +229,13 @@ async def validate_query(
             raw_text = response.text.strip()
             sampling_feedback["raw"] = raw_text
             try:
-                parsed = json.loads(raw_text)
+                parsed = orjson.loads(raw_text)
                 sampling_feedback["details"] = parsed
                 sampling_feedback["supported"] = True
                 sampling_allows = bool(parsed.get("allow", True)) and bool(
                     parsed.get("read_only", True)
                 )
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 sampling_feedback["error"] = "Sampling response was not valid JSON."
                 sampling_allows = False
         except Exception as exc:  # pragma: no cover - runtime safeguard
@@ -227,7 +323,7 @@ async def execute_query(
         logger.error("Validation error: %s; denying execution", str(ve))
         return [{"error": f"Query validation unavailable: {ve}", "validation": "unavailable"}]
 
-    headers = get_auth_headers(ctx)
+    headers = {**get_auth_headers(ctx), "Content-Type": "application/json"}
     payload = {
         "data": {
             "type": "Query",
@@ -240,14 +336,14 @@ async def execute_query(
             }
         }
     }
-    response = requests.post(
-        f"{SERVICE_API_BASE_URL}/service/query/production/query",
-        json=payload,
+    client = await get_async_client()
+    response = await client.post(
+        QUERY_ENDPOINT,
+        content=orjson.dumps(payload),
         headers=headers,
-        timeout=get_api_timeout(),
     )
     if response.status_code == 200:
-        data = response.json().get("data", [])
+        data = (await decode_json_async(response)).get("data", [])
         return data
     else:
         logger.warning(
@@ -264,7 +360,12 @@ async def execute_query(
             }
         ]
 
-def get_amazon_api_access_token(
+def _amazon_token_cache_key(remote_identity_id: int, headers: Dict[str, str]) -> Tuple[str, Optional[str]]:
+    """Scope cached Amazon tokens to the caller so tenants never share entries."""
+    return str(remote_identity_id), headers.get("Authorization")
+
+
+async def get_amazon_api_access_token(
     remote_identity_id: int,
     ctx: Optional[Context] = None,
 ) -> dict:
@@ -279,15 +380,39 @@ def get_amazon_api_access_token(
     """
     # TODO: Validate that the remote identity is the correct type?
     # Obtain the AmzAdv access token from the service API
-    headers = get_auth_headers(ctx)
-    response = requests.get(
+    return await _resolve_amazon_api_access_token(remote_identity_id, get_auth_headers(ctx))
+
+
+async def _resolve_amazon_api_access_token(remote_identity_id: int, headers: Dict[str, str]) -> dict | str:
+    """Return a cached or freshly fetched Amazon token using already resolved auth headers."""
+    cache_key = _amazon_token_cache_key(remote_identity_id, headers)
+    with _AMAZON_TOKEN_CACHE_LOCK:
+        cached = _AMAZON_TOKEN_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached Amazon API access token for remote identity %s", remote_identity_id)
+        return dict(cached)
+    token_info = await singleflight(
+        ("amazon_token",) + cache_key,
+        lambda: _fetch_amazon_api_access_token(remote_identity_id, headers, cache_key),
+    )
+    return dict(token_info) if isinstance(token_info, dict) else token_info
+
+
+async def _fetch_amazon_api_access_token(
+    remote_identity_id: int,
+    headers: Dict[str, str],
+    cache_key: Tuple[str, Optional[str]],
+) -> dict | str:
+    """Fetch an Amazon access token from the service API and cache it on success."""
+    client = await get_async_client()
+    response = await client.get(
         f"{SERVICE_API_BASE_URL}/service/amzadv/token/{remote_identity_id}",
         headers=headers,
-        timeout=get_api_timeout(),
     )
     if response.status_code == 200:
-        access_token = response.json().get("data", {}).get('access_token')
-        client_id = response.json().get("data", {}).get('client_id')
+        data = decode_json(response).get("data", {})
+        access_token = data.get('access_token')
+        client_id = data.get('client_id')
         token_length = len(access_token) if access_token else 0
         logger.debug(
             "Retrieved Amazon API access token for remote identity %s (length: %d)",
@@ -295,11 +420,14 @@ def get_amazon_api_access_token(
             token_length,
         )
     else:
-        logger.warning(f"Failed to retrieve Amazon API access token for remote identity {remote_identity_id}: {response.status_code}")
-        return str(response.json())
-    return {"access_token": access_token, "client_id": client_id}
-
-def get_amazon_advertising_profiles(
+        logger.warning("Failed to retrieve Amazon API access token for remote identity %s: %s", remote_identity_id, response.status_code)
+        return str(decode_json(response))
+    token_info = {"access_token": access_token, "client_id": client_id}
+    with _AMAZON_TOKEN_CACHE_LOCK:
+        _AMAZON_TOKEN_CACHE[cache_key] = token_info
+    return token_info
+
+async def get_amazon_advertising_profiles(
     remote_identity_id: int,
     ctx: Optional[Context] = None,
 ) -> List[dict]:
@@ -311,35 +439,96 @@ def get_amazon_advertising_profiles(
     Returns:
         List[dict]: A list of Amazon Advertising profiles.
     """
-    # Obtain the remote identity
-    remote_identity = get_remote_identity_by_id(remote_identity_id, ctx=ctx)
+    headers = get_auth_headers(ctx)
+    # The remote identity and the Amazon Advertising access token are independent lookups
+    remote_identity, token_info = await asyncio.gather(
+        resolve_remote_identity(remote_identity_id, headers),
+        _resolve_amazon_api_access_token(remote_identity_id, headers),
+    )
+    return await _fetch_amazon_profiles(remote_identity_id, remote_identity, token_info, headers)
+
+
+async def get_amazon_advertising_profiles_many(
+    remote_identity_ids: List[int],
+    ctx: Optional[Context] = None,
+) -> Dict[str, List[dict]]:
+    """
+    List the Amazon Advertising profiles for several remote identity IDs at once.
+
+    Args:
+        remote_identity_ids (List[int]): The IDs of the remote identities.
+    Returns:
+        Dict[str, List[dict]]: Amazon Advertising profiles keyed by remote identity ID.
+    """
+    headers = get_auth_headers(ctx)
+    remote_identity_ids = list(dict.fromkeys(remote_identity_ids))
+    # Keep the fan-out within Amazon's per-host limits.
+    semaphore = asyncio.Semaphore(AMZADV_MAX_CONCURRENCY)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    identities, tokens = await asyncio.gather(
+        asyncio.gather(*(limited(resolve_remote_identity(rid, headers)) for rid in remote_identity_ids)),
+        asyncio.gather(*(limited(_resolve_amazon_api_access_token(rid, headers)) for rid in remote_identity_ids)),
+    )
+    profiles = await asyncio.gather(
+        *(
+            limited(_fetch_amazon_profiles(rid, remote_identity, token_info, headers))
+            for rid, remote_identity, token_info in zip(remote_identity_ids, identities, tokens)
+        )
+    )
+    return {str(rid): rid_profiles for rid, rid_profiles in zip(remote_identity_ids, profiles)}
+
+
+async def _fetch_amazon_profiles(
+    remote_identity_id: int,
+    remote_identity: dict,
+    token_info: dict | str,
+    headers: Dict[str, str],
+) -> List[dict]:
+    """Call the regional Amazon profiles endpoint with an already resolved identity and token."""
     if not remote_identity or ('error' in remote_identity):
-        logger.warning(f"Remote identity {remote_identity_id} not found. Cannot retrieve advertising profiles.")
+        logger.warning("Remote identity %s not found. Cannot retrieve advertising profiles.", remote_identity_id)
         return []
-    # Obtain the Amazon Advertising access token
-    token_info = get_amazon_api_access_token(remote_identity_id, ctx=ctx)
     if not token_info or 'access_token' not in token_info:
-        logger.warning(f"No access token available for remote identity {remote_identity_id}. Cannot retrieve advertising profiles.")
+        logger.warning("No access token available for remote identity %s. Cannot retrieve advertising profiles.", remote_identity_id)
         return []
     # Use the access token to get the advertising profiles
-    headers = {
+    amazon_headers = {
         "Authorization": f"Bearer {token_info['access_token']}",
         "Amazon-Advertising-API-ClientId": token_info['client_id'],
     }
-    response = requests.get(
+    client = await get_async_client()
+    response = await client.get(
         f"{AMZADV_REGIONAL_BASE_URLS[remote_identity['region']]}/v2/profiles",
-        headers=headers,
-        timeout=get_api_timeout(),
+        headers=amazon_headers,
     )
     if response.status_code == 200:
-        profiles = response.json()
-        logger.debug(f"Retrieved Amazon Advertising profiles for remote identity {remote_identity_id}: {profiles}")
+        profiles = decode_json(response)
+        logger.debug("Retrieved Amazon Advertising profiles for remote identity %s: %s", remote_identity_id, profiles)
         return profiles
     else:
-        logger.warning(f"Failed to retrieve Amazon Advertising profiles for remote identity {remote_identity_id}: {response.status_code}")
+        logger.warning("Failed to retrieve Amazon Advertising profiles for remote identity %s: %s", remote_identity_id, response.status_code)
+        if response.status_code == 401:
+            # The cached token was rejected by Amazon; fetch a fresh one next time.
+            with _AMAZON_TOKEN_CACHE_LOCK:
+                _AMAZON_TOKEN_CACHE.pop(_amazon_token_cache_key(remote_identity_id, headers), None)
         return []
 
 
+def _search_rules(path: str, headers: Dict[str, str]) -> Tuple[int, List[dict]]:
+    """Search the latest rules matching ``path``; returns ``(status_code, rules)``."""
+    status_code, payload = get_json_revalidated(
+        get_http_session(),
+        RULES_SEARCH_ENDPOINT,
+        params={"path": path, "latest": "true"},
+        headers=headers,
+    )
+    return status_code, (payload or {}).get("data", [])
+
+
 def get_suggested_table_names(
     query: str,
     ctx: Optional[Context] = None,
@@ -353,27 +542,19 @@ def get_suggested_table_names(
         List[str] | str: A list of possible table names found from the query, or an error message if an invalid key is specified.
     """
     headers = get_auth_headers(ctx)
-    params = {
-        "path": query,
-        "latest": "true"
-    }
-    response = requests.get(
-        f"{SERVICE_API_BASE_URL}/service/rules/prod/v1/rules/search",
-        params=params,
-        headers=headers,
-        timeout=get_api_timeout(),
-    )
+    _, rules = _search_rules(query, headers)
     # Extract table names from the response
     table_names = []
-    for item in response.json().get("data", []):
-        if item.get("attributes", {}):
+    for item in rules:
+        attributes = item.get("attributes")
+        if attributes and (path := attributes.get("path")):
             # Append the table name with '_master' suffix to ensure use of the master view
-            table_names.append(item.get("attributes", {}).get("path").split('/')[-1] + '_master')
+            table_names.append(path.rsplit('/', 1)[-1] + '_master')
     if table_names:
-        logger.debug(f"Found table names in query '{query}': {table_names}")
+        logger.debug("Found table names in query '%s': %s", query, table_names)
         return table_names
     else:
-        logger.debug(f"No table names found in query '{query}'")
+        logger.debug("No table names found in query '%s'", query)
         return []
 
 
@@ -391,26 +572,22 @@ def get_table_schema(
     """
     headers = get_auth_headers(ctx)
     # Remove the '_master' suffix if present to match the rule path
-    if tablename.endswith('_master'):
-        tablename = tablename[:-7]
-    response = requests.get(
-        f"{SERVICE_API_BASE_URL}/service/rules/prod/v1/rules/search?path={tablename}&latest=true",
-        headers=headers,
-        timeout=get_api_timeout(),
-    )
-    if response.status_code == 200:
-        rules = response.json().get("data", [])
+    tablename = tablename.removesuffix('_master')
+    status_code, rules = _search_rules(tablename, headers)
+    if status_code == 200:
         if rules:
             if len(rules) > 1:
-                logger.warning(f"Multiple rules found for table {tablename}, determining the best match.")
-                if any(rule.get("attributes", {}).get("path").endswith(tablename) for rule in rules):
-                    rules = [rule for rule in rules if rule.get("attributes", {}).get("path").endswith(tablename)]
-            if rules:
-                logger.debug(f"Retrieved rules for table {tablename}: {rules[0]}")
-                return rules[0]
+                logger.warning("Multiple rules found for table %s, determining the best match.", tablename)
+                matched = [
+                    rule for rule in rules
+                    if ((rule.get("attributes") or {}).get("path") or "").endswith(tablename)
+                ]
+                rules = matched or rules
+            logger.debug("Retrieved rules for table %s: %s", tablename, rules[0])
+            return rules[0]
         else:
-            logger.debug(f"No rules found for table {tablename}")
+            logger.debug("No rules found for table %s", tablename)
             return None
     else:
-        logger.warning(f"Failed to retrieve rules for table {tablename}: {response.status_code}")
+        logger.warning("Failed to retrieve rules for table %s: %s", tablename, status_code)
         return None
@@ -1,11 +1,17 @@
+import copy
 import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
 
-import requests
+from cachetools import TTLCache
 from fastmcp.server.context import Context
 
 from src.utils.logging import get_logger
-from .base import get_api_timeout, get_auth_headers, safe_pagination_url
+from .base import decode_json, get_api_timeout, get_auth_headers, get_http_session, iter_json_pages
 
 logger = get_logger("subscriptions")
 SUBSCRIPTIONS_PAGE_SIZE = 1000
@@ -13,7 +19,7 @@ SUBSCRIPTIONS_MAX_PAGES = 10  # Limit to prevent infinite loops in pagination
 SUBSCRIPTIONS_API_BASE_URL = os.getenv("SUBSCRIPTIONS_API_BASE_URL", 'https://subscriptions.api.openbridge.io')
 
 # TODO: This should come from the subscription or product API
-STORAGE_PRODUCT_IDS = {
+STORAGE_PRODUCT_IDS = MappingProxyType({
     14: "redshift",
     29: "redshift",
     31: "athena",
@@ -28,13 +34,24 @@ STORAGE_PRODUCT_IDS = {
     91: "snowflake_ext_az",
     92: "snowflake_ext_gcs",
     93: "snowflake_ext_s3",
-}
-STORAGE_TYPE_MAPPING = {  # TODO: Add more storage types
-    'Google BigQuery': 'bigquery',
-    'Amazon Redshift Self Serve': 'redshift',
-    'Snowflake': 'snowflake'
-}
+})
+# Keyed by casefolded SPM product name
+STORAGE_TYPE_MAPPING = MappingProxyType({  # TODO: Add more storage types
+    'google bigquery': 'bigquery',
+    'amazon redshift self serve': 'redshift',
+    'snowflake': 'snowflake'
+})
 SPM_REQUIRED_PARAMS = ['dataset_id',]
+SPM_MAX_WORKERS = 8
+# The multi-ID SPM filter is opt-in until the deployment's /spm endpoint is confirmed to honour it.
+SPM_BULK_LOOKUP = os.getenv("SUBSCRIPTIONS_SPM_BULK_LOOKUP", "false").lower() == "true"
+SPM_BULK_MAX_PAGES = 10
+
+# Short-lived lookup caches keyed by the caller's Authorization header so tenants never share entries.
+_SUBSCRIPTION_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+_STORAGES_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_SPM_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=300)
+_CACHE_LOCK = threading.Lock()
 
 
 def get_subscriptions(
@@ -53,35 +70,27 @@ def get_subscriptions(
     params = {}
     if status is not None:
         params["status"] = status
-    next_page_url = f"{SUBSCRIPTIONS_API_BASE_URL}/sub?page=1&page_size={SUBSCRIPTIONS_PAGE_SIZE}"
+    pages = iter_json_pages(
+        get_http_session(),
+        f"{SUBSCRIPTIONS_API_BASE_URL}/sub?page=1&page_size={SUBSCRIPTIONS_PAGE_SIZE}",
+        base_url=SUBSCRIPTIONS_API_BASE_URL,
+        headers=headers,
+        params=params,
+        max_pages=SUBSCRIPTIONS_MAX_PAGES,
+        page_param="page",
+    )
     subscriptions = []
     page_count = 0
-    while next_page_url and page_count < SUBSCRIPTIONS_MAX_PAGES:
-        page_count += 1
-        response = requests.get(
-            next_page_url,
-            headers=headers,
-            params=params,
-            timeout=get_api_timeout(),
-        )
-        if response.status_code == 200:
-            subscriptions.extend(response.json().get("data", []))
-            # Paginate if necessary
-            next_page_url = safe_pagination_url(
-                response.json().get('links', {}).get('next'),
-                SUBSCRIPTIONS_API_BASE_URL,
-            )
-            if next_page_url:
-                logger.debug("Fetching next page of subscriptions: %s", next_page_url)
-                continue
-            break
-        else:
+    for response, payload in pages:
+        if payload is None:
             logger.error(
                 "Failed to retrieve subscriptions: %s - %s",
                 response.status_code,
                 response.text
             )
             return []
+        page_count += 1
+        subscriptions.extend(payload.get("data", []))
     if page_count >= SUBSCRIPTIONS_MAX_PAGES:
         logger.warning("Reached maximum number of pages (%d) for subscriptions", SUBSCRIPTIONS_MAX_PAGES)
     logger.debug("Retrieved %d subscriptions", len(subscriptions))
@@ -100,21 +109,29 @@ def get_subscription_by_id(
         Optional[Dict[Any, Any]]: The subscription represented as a dictionary in a format following JSON:API spec, or None if not found.
     """
     headers = get_auth_headers(ctx)
-    response = requests.get(
+    cache_key = (str(subscription_id), headers.get("Authorization"))
+    with _CACHE_LOCK:
+        cached = _SUBSCRIPTION_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached subscription %s", subscription_id)
+        return copy.deepcopy(cached)
+    response = get_http_session().get(
         f"{SUBSCRIPTIONS_API_BASE_URL}/sub/{subscription_id}",
         headers=headers,
         timeout=get_api_timeout(),
     )
     if response.status_code == 200:
-        subscription = response.json().get("data", None)
+        subscription = decode_json(response).get("data", None)
         if subscription:
-            logger.debug(f"Retrieved subscription {subscription_id}")
-            return subscription
+            logger.debug("Retrieved subscription %s", subscription_id)
+            with _CACHE_LOCK:
+                _SUBSCRIPTION_CACHE[cache_key] = subscription
+            return copy.deepcopy(subscription)
         else:
-            logger.warning(f"Subscription {subscription_id} not found in response")
+            logger.warning("Subscription %s not found in response", subscription_id)
             return None
     else:
-        logger.error(f"Failed to retrieve subscription {subscription_id}: {response.status_code} - {response.text}")
+        logger.error("Failed to retrieve subscription %s: %s - %s", subscription_id, response.status_code, response.text)
         return None
 
 
@@ -131,42 +148,152 @@ def get_storage_subscriptions(
     headers = get_auth_headers(ctx)
     params = {}
     storages = []
-    sub_response = requests.get(
-        f"{SUBSCRIPTIONS_API_BASE_URL}/storages?status=active",
-        headers=headers,
-        params=params,
-        timeout=get_api_timeout(),
-    ).json()
+    authorization = headers.get("Authorization")
+    with _CACHE_LOCK:
+        sub_response = _STORAGES_CACHE.get(authorization)
+    if sub_response is None:
+        sub_response = decode_json(get_http_session().get(
+            f"{SUBSCRIPTIONS_API_BASE_URL}/storages?status=active",
+            headers=headers,
+            params=params,
+            timeout=get_api_timeout(),
+        ))
+        with _CACHE_LOCK:
+            _STORAGES_CACHE[authorization] = sub_response
+    included_by_id = {str(included['id']): included['attributes'] for included in sub_response.get('included', [])}
     for sub in sub_response['data']:
-        for included in sub_response['included']:
-            if str(included['id']) == str(sub['attributes']['storage_group_id']):
-                key_name = included['attributes']['key_name']
-                name = included['attributes']['name']
-                break
-        storages.append({"storage_id": sub['attributes']['storage_group_id'], "subscription_id": sub['id'], "name": name, "key_name": key_name})
-    
-    # Get SPM for each storage
-    result = []
-    for storage in storages:
-        url = f'{SUBSCRIPTIONS_API_BASE_URL}/spm?subscription={storage["subscription_id"]}'
-        spm_resp = requests.get(url, headers=headers, timeout=get_api_timeout())
-        spm_resp.raise_for_status()
-        spm_data = spm_resp.json().get('data', [])
-        storage_spm = {
-            x['attributes']['data_key']: x['attributes']['data_value']
-            for x in spm_data
-            if x.get('attributes', {}).get('data_key') in SPM_REQUIRED_PARAMS
-        }
-        # Safely get storage type from first SPM entry if available
-        storage_type = 'unknown'
-        if spm_data:
-            product_name = (
-                spm_data[0]
-                .get('attributes', {})
-                .get('product', {})
-                .get('name')
+        storage_group = included_by_id.get(str(sub['attributes']['storage_group_id']), {})
+        storages.append({
+            "storage_id": sub['attributes']['storage_group_id'],
+            "subscription_id": sub['id'],
+            "name": storage_group.get('name'),
+            "key_name": storage_group.get('key_name'),
+        })
+
+    if not storages:
+        return []
+    spm_by_subscription = _get_spm(storages, headers)
+    return [
+        _storage_with_spm(storage, spm_by_subscription[str(storage["subscription_id"])])
+        for storage in storages
+    ]
+
+
+def _get_spm(storages: List[Dict[str, Any]], headers: Dict[str, str]) -> Dict[str, List[Dict[Any, Any]]]:
+    """Return the SPM entries for each storage, fetching only those not already cached."""
+    authorization = headers.get("Authorization")
+    spm_by_subscription: Dict[str, List[Dict[Any, Any]]] = {}
+    missing = []
+    with _CACHE_LOCK:
+        for storage in storages:
+            subscription_id = str(storage["subscription_id"])
+            cached = _SPM_CACHE.get((subscription_id, authorization))
+            if cached is None:
+                missing.append(storage)
+            else:
+                spm_by_subscription[subscription_id] = cached
+    if not missing:
+        return spm_by_subscription
+
+    # Fetch the SPM for all storages in one filtered listing when enabled; any storage the
+    # listing did not cover is looked up on its own.
+    fetched = _fetch_spm_bulk(missing, headers) if SPM_BULK_LOOKUP and len(missing) > 1 else {}
+    unresolved = [storage for storage in missing if str(storage["subscription_id"]) not in fetched]
+    if unresolved:
+        with ThreadPoolExecutor(max_workers=min(len(unresolved), SPM_MAX_WORKERS)) as executor:
+            spm_results = executor.map(lambda storage: _fetch_spm(storage, headers), unresolved)
+            fetched.update(
+                (str(storage["subscription_id"]), spm_data) for storage, spm_data in zip(unresolved, spm_results)
             )
-            if product_name:
-                storage_type = STORAGE_TYPE_MAPPING.get(product_name, 'unknown')
-        result.append({"storage_type": storage_type, **storage, **storage_spm})
-    return result
+    with _CACHE_LOCK:
+        for storage in missing:
+            subscription_id = str(storage["subscription_id"])
+            spm_data = fetched.get(subscription_id, [])
+            _SPM_CACHE[(subscription_id, authorization)] = spm_data
+            spm_by_subscription[subscription_id] = spm_data
+    return spm_by_subscription
+
+
+def _spm_subscription_id(entry: Dict[Any, Any]) -> Optional[str]:
+    """Return the subscription an SPM entry belongs to, if the API reports it."""
+    subscription_id = entry.get('attributes', {}).get('subscription_id')
+    if subscription_id is None:
+        subscription_id = (
+            entry.get('relationships', {})
+            .get('subscription', {})
+            .get('data', {})
+            .get('id')
+        )
+    return str(subscription_id) if subscription_id is not None else None
+
+
+def _fetch_spm_bulk(
+    storages: List[Dict[str, Any]],
+    headers: Dict[str, str],
+) -> Dict[str, List[Dict[Any, Any]]]:
+    """
+    Fetch the SPM entries for several storages through the multi-ID filter, following pagination.
+
+    Returns the entries grouped by subscription ID. Subscriptions without entries are left
+    out, and the whole result is dropped when the listing fails, is cut off at
+    SPM_BULK_MAX_PAGES, or contains an entry that cannot be attributed to one of the
+    requested subscriptions (the filter was ignored); the caller then looks those
+    storages up individually.
+    """
+    subscription_ids = [str(storage["subscription_id"]) for storage in storages]
+    requested = set(subscription_ids)
+    query = urlencode({"subscription": ",".join(subscription_ids), "page_size": SUBSCRIPTIONS_PAGE_SIZE})
+    pages = iter_json_pages(
+        get_http_session(),
+        f"{SUBSCRIPTIONS_API_BASE_URL}/spm?{query}",
+        base_url=SUBSCRIPTIONS_API_BASE_URL,
+        headers=headers,
+        max_pages=SPM_BULK_MAX_PAGES,
+    )
+    spm_by_subscription: Dict[str, List[Dict[Any, Any]]] = defaultdict(list)
+    page_count = 0
+    payload: Optional[Dict[str, Any]] = None
+    for response, payload in pages:
+        if payload is None:
+            logger.debug("Bulk SPM lookup failed (%s); fetching per storage", response.status_code)
+            return {}
+        page_count += 1
+        for entry in payload.get('data', []):
+            subscription_id = _spm_subscription_id(entry)
+            if subscription_id not in requested:
+                logger.debug("Bulk SPM response does not honour the subscription filter; fetching per storage")
+                return {}
+            spm_by_subscription[subscription_id].append(entry)
+    if page_count >= SPM_BULK_MAX_PAGES and payload is not None and payload.get('links', {}).get('next'):
+        logger.warning("Bulk SPM lookup exceeded %d pages; fetching per storage", SPM_BULK_MAX_PAGES)
+        return {}
+    return dict(spm_by_subscription)
+
+
+def _fetch_spm(storage: Dict[str, Any], headers: Dict[str, str]) -> List[Dict[Any, Any]]:
+    """Return the SPM entries for a single storage subscription."""
+    url = f'{SUBSCRIPTIONS_API_BASE_URL}/spm?subscription={storage["subscription_id"]}'
+    spm_resp = get_http_session().get(url, headers=headers, timeout=get_api_timeout())
+    spm_resp.raise_for_status()
+    return decode_json(spm_resp).get('data', [])
+
+
+def _storage_with_spm(storage: Dict[str, Any], spm_data: List[Dict[Any, Any]]) -> Dict[str, Any]:
+    """Merge the required SPM parameters and storage type into a storage entry."""
+    storage_spm = {
+        x['attributes']['data_key']: x['attributes']['data_value']
+        for x in spm_data
+        if x.get('attributes', {}).get('data_key') in SPM_REQUIRED_PARAMS
+    }
+    # Safely get storage type from first SPM entry if available
+    storage_type = 'unknown'
+    if spm_data:
+        product_name = (
+            spm_data[0]
+            .get('attributes', {})
+            .get('product', {})
+            .get('name')
+        )
+        if product_name:
+            storage_type = STORAGE_TYPE_MAPPING.get(product_name.casefold(), 'unknown')
+    return {"storage_type": storage_type, **storage, **storage_spm}
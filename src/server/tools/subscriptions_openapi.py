@@ -1,37 +1,116 @@
+import hashlib
+import importlib.util
 import os
+import tempfile
+from pathlib import Path
+from typing import Tuple
+
 import httpx
 from fastmcp import FastMCP
 import yaml
 import asyncio
 from src.utils.http import http_client_manager
 from src.utils.http_client import AuthenticatedClient
+from src.utils.logging import get_logger
+
+logger = get_logger("subscriptions_openapi")
+
+SUBSCRIPTIONS_API_ENDPOINT = os.getenv("SUBSCRIPTIONS_API_ENDPOINT", "https://subscriptions.api.openbridge.io")
+# Parsed once per process; the raw schema and its ETag persist across restarts for conditional fetches.
+# They live in the per-user cache directory, since a cached copy is served when the fetch fails.
+SCHEMA_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "openbridge-mcp"
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+CLIENT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 multiplexing is on by default when the optional ``h2`` package is installed."""
+    if os.getenv("HTTP_ENABLE_HTTP2", "true").lower() != "true":
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but 'h2' package not installed; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _cache_paths(url: str) -> Tuple[Path, Path]:
+    """Return the schema and ETag cache files for ``url``, keyed so environments never share them."""
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    schema_path = SCHEMA_CACHE_DIR / f"subs_schema-{key}.yaml"
+    return schema_path, schema_path.with_suffix(".etag")
+
+
+def _write_private(path: Path, data: bytes) -> None:
+    """Atomically replace ``path`` with ``data``, readable only by the current user."""
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # mkstemp creates the file with mode 0600.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+async def _load_spec(client: httpx.AsyncClient, url: str) -> dict:
+    """Load the OpenAPI schema, revalidating the on-disk copy with its ETag."""
+    schema_path, etag_path = _cache_paths(url)
+    headers = {}
+    if schema_path.exists() and etag_path.exists():
+        headers["If-None-Match"] = etag_path.read_text().strip()
+    try:
+        response = await client.get(url, headers=headers)
+    except httpx.HTTPError as e:
+        if not schema_path.exists():
+            raise
+        logger.warning("Failed to fetch OpenAPI schema, using cached copy: %s", e)
+        return yaml.load(schema_path.read_bytes(), Loader=YAML_LOADER)
+
+    if response.status_code == 304:
+        logger.debug("OpenAPI schema not modified; using cached copy")
+        body = schema_path.read_bytes()
+    else:
+        response.raise_for_status()
+        body = response.content
+        etag = response.headers.get("ETag")
+        try:
+            # Drop the old ETag first so it can never validate a different schema body.
+            etag_path.unlink(missing_ok=True)
+            _write_private(schema_path, body)
+            if etag:
+                _write_private(etag_path, etag.encode())
+        except OSError as e:
+            logger.warning("Failed to cache OpenAPI schema: %s", e)
+    return yaml.load(body, Loader=YAML_LOADER)
 
 
 class SubscriptionsOpenAPI(AuthenticatedClient):
     def __init__(self, auth_manager=None):
         # Create an HTTP client for your API
         self.client = AuthenticatedClient(
-            base_url=os.getenv("SUBSCRIPTIONS_API_ENDPOINT", "https://subscriptions.api.openbridge.io"),
+            base_url=SUBSCRIPTIONS_API_ENDPOINT,
             headers={"User-Agent": "Openbridge-MCP/1.0"},
             timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=CLIENT_LIMITS,
+            http2=_http2_enabled(),
             auth_manager=auth_manager,
         )
         http_client_manager.register_external_client(self.client)
+        self.init_tools()
 
+    async def register_tools(self):
         # Load your OpenAPI spec
-        openapi_spec = yaml.safe_load(httpx.get(f"{os.getenv('SUBSCRIPTIONS_API_ENDPOINT', 'https://subscriptions.api.openbridge.io')}/api/schema.yaml").text)
-
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
+            openapi_spec = await _load_spec(client, f"{SUBSCRIPTIONS_API_ENDPOINT}/api/schema.yaml")
 
         # Create the MCP server
-        mcp = FastMCP.from_openapi(
+        self.mcp = FastMCP.from_openapi(
             openapi_spec=openapi_spec,
             client=self.client,
             name="Subscriptions API MCP Server"
         )
-        self.mcp = mcp
-        self.init_tools()
-
-    async def register_tools(self):
         tools = await self.mcp.get_tools()
         return tools
 
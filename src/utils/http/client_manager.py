@@ -90,7 +90,7 @@ class HTTPClientManager:
         :return: Configured HTTP client instance
         :rtype: httpx.AsyncClient
         """
-        http2_flag = kwargs.get("http2")
+        http2_flag = kwargs.pop("http2", None)
         if http2_flag is None:
             http2_flag = (
                 os.getenv("HTTP_ENABLE_HTTP2", "false").lower() == "true"
@@ -103,7 +103,7 @@ class HTTPClientManager:
                     "HTTP/2 requested but 'h2' package not installed; falling back to HTTP/1.1"
                 )
                 http2_flag = False
-        follow = kwargs.get("follow_redirects", True)
+        follow = kwargs.pop("follow_redirects", True)
 
         def timeout_key(t: Optional[httpx.Timeout]):
             if not t:
@@ -4,12 +4,16 @@ This module provides an authenticated HTTP client that manages headers
 for Amazon Advertising API calls.
 """
 
+import asyncio
+import inspect
 import logging
-from typing import Any, Dict, Optional
-from urllib.parse import urlparse
+import time
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
+import jwt
 
+from src.auth.simple import decode_unverified_claims
 from src.utils.header_resolver import HeaderNameResolver
 from src.utils.media import MediaTypeRegistry
 
@@ -20,6 +24,10 @@ _REGION_OVERRIDE: Optional[str] = None
 _MARKETPLACE_OVERRIDE: Optional[str] = None
 _ROUTING_STATE: Dict[str, Any] = {}
 
+# Upper bound on how long resolved auth headers are reused; never past the token's own expiry.
+AUTH_HEADERS_CACHE_SECONDS = 300.0
+AUTH_HEADERS_EXPIRY_MARGIN = 30.0
+
 
 class AuthenticatedClient(httpx.AsyncClient):
     """Enhanced HTTP client that manages Openbridge API authentication headers.
@@ -61,6 +69,8 @@ class AuthenticatedClient(httpx.AsyncClient):
         self.header_resolver: HeaderNameResolver = (
             header_resolver or HeaderNameResolver()
         )
+        self._auth_cache: Optional[Tuple[float, Dict[str, str]]] = None
+        self._auth_lock = asyncio.Lock()
 
     async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
         """Single interception point for all HTTP requests.
@@ -83,53 +93,41 @@ class AuthenticatedClient(httpx.AsyncClient):
         :rtype: httpx.Response
         :raises httpx.RequestError: When required auth headers are missing
         """
-        # Log incoming request for debugging
-        logger.debug(f"=== SEND: {request.method} {request.url}")
-        logger.debug(
-            f"    Headers before injection: {list(request.headers.keys())}"
-        )
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("=== SEND: %s %s", request.method, request.url)
+            logger.debug("    Headers before injection: %s", list(request.headers.keys()))
 
         # Check if already processed (idempotent)
         if not request.extensions.get("auth_injected"):
             await self._inject_headers(request)
             request.extensions["auth_injected"] = True
-            logger.debug(
-                f"Headers injected for {request.method} {request.url}"
-            )
-            logger.debug(
-                f"    Headers after injection: {list(request.headers.keys())}"
-            )
-            # Log critical headers for debugging
-            logger.debug(
-                f"    Accept: {request.headers.get('accept', 'NOT SET')}"
-            )
-            logger.debug(
-                f"    Content-Type: {request.headers.get('content-type', 'NOT SET')}"
-            )
-            # Verify auth header is present
-            if "authorization" in request.headers:
-                auth_val = request.headers["authorization"]
-                logger.debug(
-                    f"    Authorization present: Bearer [{len(auth_val) - 7} chars]"
-                )
+            if debug:
+                logger.debug("Headers injected for %s %s", request.method, request.url)
+                logger.debug("    Headers after injection: %s", list(request.headers.keys()))
+                # Log critical headers for debugging
+                logger.debug("    Accept: %s", request.headers.get("accept", "NOT SET"))
+                logger.debug("    Content-Type: %s", request.headers.get("content-type", "NOT SET"))
+                # Verify auth header is present
+                if "authorization" in request.headers:
+                    auth_val = request.headers["authorization"]
+                    logger.debug("    Authorization present: Bearer [%d chars]", len(auth_val) - 7)
 
         # Log the actual request headers right before sending
-        logger.debug("=== ACTUAL REQUEST BEING SENT ===")
-        logger.debug(f"URL: {request.url}")
-        logger.debug("Headers:")
-        for k, v in request.headers.items():
-            if k.lower() in [
-                "authorization",
-            ]:
-                logger.debug(f"  {k}: [REDACTED]")
-            else:
-                logger.debug(f"  {k}: {v}")
+        if debug:
+            logger.debug("=== ACTUAL REQUEST BEING SENT ===")
+            logger.debug("URL: %s", request.url)
+            logger.debug("Headers:")
+            for k, v in request.headers.items():
+                if k.lower() in self._FORBID_SUBSTRS:
+                    logger.debug("  %s: [REDACTED]", k)
+                else:
+                    logger.debug("  %s: %s", k, v)
 
         # Call parent's send
         resp = await super().send(request, **kwargs)
-        logger.debug(
-            f"=== RESPONSE: {resp.status_code} for {request.method} {request.url}"
-        )
+        if debug:
+            logger.debug("=== RESPONSE: %s for %s %s", resp.status_code, request.method, request.url)
 
         return resp
 
@@ -147,6 +145,38 @@ class AuthenticatedClient(httpx.AsyncClient):
         except Exception:
             return data
 
+    async def _get_auth_headers(self) -> Dict[str, str]:
+        """Return the auth manager's headers, reusing them until the token nears expiry.
+
+        Concurrent requests that miss the cache share a single refresh.
+        """
+        cached = self._auth_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        async with self._auth_lock:
+            cached = self._auth_cache
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            headers = self.auth_manager.get_headers()
+            if inspect.isawaitable(headers):
+                headers = await headers
+            self._auth_cache = (time.monotonic() + self._auth_headers_ttl(headers), headers)
+            return headers
+
+    @staticmethod
+    def _auth_headers_ttl(headers: Dict[str, str]) -> float:
+        """Seconds the headers may be reused, bounded by the bearer token's expiry."""
+        token = headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        try:
+            claims = decode_unverified_claims(token)
+        except jwt.PyJWTError:
+            return AUTH_HEADERS_CACHE_SECONDS
+        expires_at = claims.get("expires_at") or claims.get("exp")
+        if expires_at is None:
+            return AUTH_HEADERS_CACHE_SECONDS
+        remaining = float(expires_at) - time.time() - AUTH_HEADERS_EXPIRY_MARGIN
+        return max(0.0, min(AUTH_HEADERS_CACHE_SECONDS, remaining))
+
     async def _inject_headers(self, request: httpx.Request) -> None:
         """Inject authentication and media headers into a request.
 
@@ -169,19 +199,14 @@ class AuthenticatedClient(httpx.AsyncClient):
                 )
                 request.headers["Accept"] = preferred
 
-        # 2) STRIP POLLUTED HEADERS
-        removed = []
-        for key in list(request.headers.keys()):
-            if any(s in key.lower() for s in self._FORBID_SUBSTRS):
-                removed.append(key)
-                del request.headers[key]
-        if removed:
-            logger.debug("🧹 Scrubbed headers from request: %s", removed)
+        # 2) STRIP POLLUTED HEADERS (httpx header lookups are case-insensitive)
+        for name in self._FORBID_SUBSTRS:
+            if request.headers.pop(name, None) is not None:
+                logger.debug("🧹 Scrubbed %s header from request", name)
 
         # 3) ADD CORRECT AUTH HEADERS (OB API calls)
-        u_host = urlparse(url).netloc.lower()
-        if "openbridge.io" in u_host:
-            headers = await self.auth_manager.get_headers()
+        if "openbridge.io" in request.url.host:
+            headers = await self._get_auth_headers()
             request.headers['Authorization'] = headers.get('Authorization', '')
 
         # Ensure Accept header for JSON responses
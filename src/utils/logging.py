@@ -1,15 +1,57 @@
 """Structured logging configuration for the MCP Query Execution server."""
 
-import copy
 import logging
 import sys
-from datetime import datetime, timezone
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+import orjson
 
 from src.utils.security import SanitizingFormatter
 
 
+# LogRecord attributes that are not user-supplied extras.
+_RESERVED_ATTRS = frozenset({
+    "name",
+    "msg",
+    "args",
+    "levelname",
+    "levelno",
+    "pathname",
+    "filename",
+    "module",
+    "lineno",
+    "funcName",
+    "created",
+    "msecs",
+    "relativeCreated",
+    "thread",
+    "threadName",
+    "processName",
+    "process",
+    "getMessage",
+    "exc_info",
+    "exc_text",
+    "stack_info",
+    "timestamp",
+})
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") for the most recently formatted record
+_TIMESTAMP_CACHE: Tuple[int, str] = (-1, "")
+
+
+def _format_timestamp(created: float) -> str:
+    """Render a record's creation time as ISO-8601 UTC, reusing the per-second prefix."""
+    global _TIMESTAMP_CACHE
+    second = int(created)
+    cached_second, prefix = _TIMESTAMP_CACHE
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _TIMESTAMP_CACHE = (second, prefix)
+    return f"{prefix}.{int((created - second) * 1_000_000):06d}Z"
+
+
 class StructuredFormatter(logging.Formatter):
     """Custom formatter for structured logging with sanitization."""
 
@@ -19,52 +61,33 @@ class StructuredFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record with structured data."""
-        sanitized = copy.copy(record)
-        if record.args:
-            sanitized.args = copy.copy(record.args)
-        # Apply sanitization side effects.
-        self._sanitizer.format(sanitized)
-
-        sanitized.timestamp = datetime.now(timezone.utc).isoformat()
+        # The sanitizer rewrites msg/args in place; restore them so other handlers see the original record.
+        msg, args = record.msg, record.args
+        try:
+            self._sanitizer.format(record)
+            message = record.getMessage()
+        finally:
+            record.msg, record.args = msg, args
 
         structured_data = {
-            "timestamp": sanitized.timestamp,
-            "level": sanitized.levelname,
-            "logger": sanitized.name,
-            "message": sanitized.getMessage(),
+            "timestamp": _format_timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": message,
         }
 
-        if sanitized.exc_info:
-            structured_data["exception"] = self.formatException(sanitized.exc_info)
-
-        for key, value in sanitized.__dict__.items():
-            if key not in [
-                "name",
-                "msg",
-                "args",
-                "levelname",
-                "levelno",
-                "pathname",
-                "filename",
-                "module",
-                "lineno",
-                "funcName",
-                "created",
-                "msecs",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "processName",
-                "process",
-                "getMessage",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-                "timestamp",
-            ]:
+        if record.exc_info:
+            structured_data["exception"] = self.formatException(record.exc_info)
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
                 structured_data[key] = value
 
-        return f"{structured_data}"
+        return orjson.dumps(
+            structured_data,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS,
+        ).decode()
 
 
 def setup_logging(
@@ -4,3 +4,29 @@ from pathlib import Path
 REPO_ROOT = Path(__file__).resolve().parent.parent
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
+
+import pytest  # noqa: E402
+
+from src.auth import simple  # noqa: E402
+from src.server.tools import base, remote_identity, service, subscriptions  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clear_tool_caches():
+    """Keep per-process TTL caches from leaking between tests."""
+    remote_identity._REMOTE_IDENTITY_CACHE.clear()
+    service._AMAZON_TOKEN_CACHE.clear()
+    service._VALIDATION_CACHE.clear()
+    base._HTTP_CACHE.clear()
+    subscriptions._SUBSCRIPTION_CACHE.clear()
+    subscriptions._STORAGES_CACHE.clear()
+    subscriptions._SPM_CACHE.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_singleton(monkeypatch):
+    """Give every test a fresh OpenbridgeAuth so cached JWTs never cross tests."""
+    monkeypatch.setattr(simple, "_AUTH_INSTANCE", None)
+    simple.decode_unverified_claims.cache_clear()
+    yield
@@ -1,5 +1,26 @@
+import pytest
+
 from src.server import mcp_server
 
+EXPECTED_TOOLS_WITHOUT_API_KEY = frozenset({
+    "get_remote_identities",
+    "get_remote_identity_by_id",
+    "get_amazon_api_access_token",
+    "get_amazon_advertising_profiles",
+    "get_amazon_advertising_profiles_many",
+    "get_table_schema",
+    "get_suggested_table_names",
+    "get_healthchecks",
+    "get_jobs",
+    "create_job",
+    "get_subscriptions",
+    "get_storage_subscriptions",
+    "get_product_stage_ids",
+    "search_products",
+    "list_product_tables",
+})
+EXPECTED_TOOLS_WITH_API_KEY = EXPECTED_TOOLS_WITHOUT_API_KEY | {"validate_query", "execute_query"}
+
 
 class FakeAuthConfig:
     def __init__(self):
@@ -33,98 +54,54 @@ class FakeFastMCP:
         return decorator
 
 
-def test_create_mcp_server_registers_expected_tools_with_api_key(monkeypatch):
-    """Test that query validation tools are registered when API key is present."""
-    fake_middleware = object()
-    fake_sampling_handler = object()
-    fake_config = FakeAuthConfig()
+FAKE_MIDDLEWARE = object()
+FAKE_SAMPLING_HANDLER = object()
+FAKE_CONFIG = FakeAuthConfig()
 
-    # Set an API key to enable query validation tools
-    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
 
-    monkeypatch.setattr(mcp_server, "create_openbridge_config", lambda: fake_config)
-    monkeypatch.setattr(mcp_server, "get_auth_manager", lambda: "auth-manager")
+def _fake_create_auth_middleware(config, *, jwt_middleware, auth_manager):
+    assert config is FAKE_CONFIG
+    assert jwt_middleware is False
+    assert auth_manager == "auth-manager"
+    return [FAKE_MIDDLEWARE]
 
-    def fake_create_auth_middleware(config, *, jwt_middleware, auth_manager):
-        assert config is fake_config
-        assert jwt_middleware is False
-        assert auth_manager == "auth-manager"
-        return [fake_middleware]
 
-    monkeypatch.setattr(mcp_server, "create_auth_middleware", fake_create_auth_middleware)
-    monkeypatch.setattr(mcp_server, "create_sampling_handler", lambda: fake_sampling_handler)
-    monkeypatch.setattr(mcp_server, "FastMCP", FakeFastMCP)
+@pytest.fixture(scope="module", params=["with_key", "without_key"])
+def built_server(request):
+    """Build the server once per module for each API-key configuration."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.delenv("FASTMCP_SAMPLING_API_KEY", raising=False)
+        if request.param == "with_key":
+            mp.setenv("OPENAI_API_KEY", "test-key")
+        else:
+            mp.delenv("OPENAI_API_KEY", raising=False)
+        mp.setattr(mcp_server, "create_openbridge_config", lambda: FAKE_CONFIG)
+        mp.setattr(mcp_server, "get_auth_manager", lambda: "auth-manager")
+        mp.setattr(mcp_server, "create_auth_middleware", _fake_create_auth_middleware)
+        mp.setattr(mcp_server, "create_sampling_handler", lambda: FAKE_SAMPLING_HANDLER)
+        mp.setattr(mcp_server, "FastMCP", FakeFastMCP)
+        yield mcp_server.create_mcp_server()
 
-    server = mcp_server.create_mcp_server()
 
-    assert isinstance(server, FakeFastMCP)
-    assert server.middleware == [fake_middleware]
-    assert server.sampling_handler is fake_sampling_handler
-
-    expected_tools = {
-        "get_remote_identities",
-        "get_remote_identity_by_id",
-        "validate_query",
-        "execute_query",
-        "get_amazon_api_access_token",
-        "get_amazon_advertising_profiles",
-        "get_table_schema",
-        "get_suggested_table_names",
-        "get_healthchecks",
-        "get_jobs",
-        "create_job",
-        "get_subscriptions",
-        "get_storage_subscriptions",
-        "get_product_stage_ids",
-        "search_products",
-        "list_product_tables",
-    }
-
-    assert expected_tools == set(server.registered_tools)
-
-
-def test_create_mcp_server_without_api_key_skips_validation_tools(monkeypatch):
-    """Test that query validation tools are NOT registered when API key is missing."""
-    fake_middleware = object()
-    fake_sampling_handler = object()
-    fake_config = FakeAuthConfig()
-
-    # Ensure no API keys are set
-    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
-    monkeypatch.delenv("FASTMCP_SAMPLING_API_KEY", raising=False)
+@pytest.mark.parametrize("built_server", ["with_key"], indirect=True)
+def test_create_mcp_server_registers_expected_tools_with_api_key(built_server):
+    """Test that query validation tools are registered when API key is present."""
+    server = built_server
 
-    monkeypatch.setattr(mcp_server, "create_openbridge_config", lambda: fake_config)
-    monkeypatch.setattr(mcp_server, "get_auth_manager", lambda: "auth-manager")
+    assert isinstance(server, FakeFastMCP)
+    assert server.middleware == [FAKE_MIDDLEWARE]
+    assert server.sampling_handler is FAKE_SAMPLING_HANDLER
 
-    def fake_create_auth_middleware(config, *, jwt_middleware, auth_manager):
-        return [fake_middleware]
+    assert EXPECTED_TOOLS_WITH_API_KEY == server.registered_tools.keys()
 
-    monkeypatch.setattr(mcp_server, "create_auth_middleware", fake_create_auth_middleware)
-    monkeypatch.setattr(mcp_server, "create_sampling_handler", lambda: fake_sampling_handler)
-    monkeypatch.setattr(mcp_server, "FastMCP", FakeFastMCP)
 
-    server = mcp_server.create_mcp_server()
+@pytest.mark.parametrize("built_server", ["without_key"], indirect=True)
+def test_create_mcp_server_without_api_key_skips_validation_tools(built_server):
+    """Test that query validation tools are NOT registered when API key is missing."""
+    server = built_server
 
     # Should have all tools EXCEPT validate_query and execute_query
-    expected_tools = {
-        "get_remote_identities",
-        "get_remote_identity_by_id",
-        # validate_query and execute_query should be MISSING
-        "get_amazon_api_access_token",
-        "get_amazon_advertising_profiles",
-        "get_table_schema",
-        "get_suggested_table_names",
-        "get_healthchecks",
-        "get_jobs",
-        "create_job",
-        "get_subscriptions",
-        "get_storage_subscriptions",
-        "get_product_stage_ids",
-        "search_products",
-        "list_product_tables",
-    }
-
-    assert expected_tools == set(server.registered_tools)
+    assert EXPECTED_TOOLS_WITHOUT_API_KEY == server.registered_tools.keys()
     assert "validate_query" not in server.registered_tools
     assert "execute_query" not in server.registered_tools
 
@@ -152,19 +129,10 @@ def test_create_mcp_server_with_fastmcp_api_key(monkeypatch):
     assert "execute_query" in server.registered_tools
 
 
-def test_health_endpoint(monkeypatch):
+@pytest.mark.parametrize("built_server", ["without_key"], indirect=True)
+def test_health_endpoint(built_server):
     """Test that health check endpoint is registered."""
-    fake_middleware = object()
-    fake_sampling_handler = object()
-    fake_config = FakeAuthConfig()
-
-    monkeypatch.setattr(mcp_server, "create_openbridge_config", lambda: fake_config)
-    monkeypatch.setattr(mcp_server, "get_auth_manager", lambda: "auth-manager")
-    monkeypatch.setattr(mcp_server, "create_auth_middleware", lambda *args, **kwargs: [fake_middleware])
-    monkeypatch.setattr(mcp_server, "create_sampling_handler", lambda: fake_sampling_handler)
-    monkeypatch.setattr(mcp_server, "FastMCP", FakeFastMCP)
-
-    server = mcp_server.create_mcp_server()
+    server = built_server
 
     # Verify the health endpoint was registered
     assert isinstance(server, FakeFastMCP)
@@ -0,0 +1,20 @@
+"""Lightweight HTTP fakes shared by the tool tests."""
+
+import orjson
+import requests
+
+
+class FakeResponse:
+    """Slotted stand-in for an HTTP response carrying a JSON body."""
+
+    __slots__ = ("status_code", "content", "text", "headers")
+
+    def __init__(self, status_code, payload=None, text="", headers=None):
+        self.status_code = status_code
+        self.content = b"" if payload is None else orjson.dumps(payload)
+        self.text = text
+        self.headers = {} if headers is None else headers
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
@@ -0,0 +1,20 @@
+import importlib
+from types import MappingProxyType
+
+import pytest
+
+# Read-only so a tool that mutated its headers could not leak state between tests.
+AUTH_HEADERS = MappingProxyType({"Authorization": "Bearer valid.jwt.token"})
+
+
+@pytest.fixture
+def mock_auth_headers(monkeypatch, request):
+    """Mock get_auth_headers on the tool module under test to return valid auth headers.
+
+    The tool module is derived from the test module name, e.g. ``test_jobs`` patches
+    ``src.server.tools.jobs``.
+    """
+    tool_name = request.module.__name__.rsplit(".", 1)[-1].removeprefix("test_")
+    tool_module = importlib.import_module(f"src.server.tools.{tool_name}")
+    monkeypatch.setattr(tool_module, "get_auth_headers", lambda ctx=None: AUTH_HEADERS)
+    return AUTH_HEADERS
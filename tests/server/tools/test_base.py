@@ -1,10 +1,24 @@
+import asyncio
 from types import SimpleNamespace
 
+import orjson
+import pytest
+import requests
+
 from src.server.tools import base
 from src.auth.simple import AuthenticationError
 
 
-def test_get_auth_headers_without_token(monkeypatch):
+@pytest.fixture
+def fake_refresh_post(monkeypatch):
+    """Install ``fake_post`` as the refresh-token exchange."""
+    def install(fake_post):
+        monkeypatch.setattr("src.auth.simple._get_session", lambda: SimpleNamespace(post=fake_post))
+
+    return install
+
+
+def test_get_auth_headers_without_token(monkeypatch, fake_refresh_post):
     monkeypatch.delenv("OPENBRIDGE_REFRESH_TOKEN", raising=False)
     calls = []
 
@@ -12,8 +26,7 @@ def test_get_auth_headers_without_token(monkeypatch):
         calls.append((args, kwargs))
         return SimpleNamespace()
 
-    monkeypatch.setattr("src.auth.simple.requests.post", fake_post)
-    monkeypatch.setattr("src.auth.simple._AUTH_INSTANCE", None)
+    fake_refresh_post(fake_post)
 
     headers = base.get_auth_headers()
 
@@ -21,7 +34,7 @@ def test_get_auth_headers_without_token(monkeypatch):
     assert calls == []
 
 
-def test_get_auth_headers_converts_refresh_token(monkeypatch):
+def test_get_auth_headers_converts_refresh_token(monkeypatch, fake_refresh_post):
     monkeypatch.setenv("OPENBRIDGE_REFRESH_TOKEN", "abc:def")
 
     def fake_post(url, json, headers, timeout):
@@ -32,8 +45,7 @@ def test_get_auth_headers_converts_refresh_token(monkeypatch):
             json=lambda: {"data": {"attributes": {"token": "jwt-token"}}},
         )
 
-    monkeypatch.setattr("src.auth.simple.requests.post", fake_post)
-    monkeypatch.setattr("src.auth.simple._AUTH_INSTANCE", None)
+    fake_refresh_post(fake_post)
     monkeypatch.setattr("src.auth.simple.time.time", lambda: 1000)
     monkeypatch.setattr("src.auth.simple.jwt.decode", lambda token, options: {"expires_at": 2000})
 
@@ -41,45 +53,213 @@ def test_get_auth_headers_converts_refresh_token(monkeypatch):
 
     assert headers == {"Authorization": "Bearer jwt-token"}
 
-def test_get_auth_headers_prefers_context_jwt(monkeypatch):
-    ctx = SimpleNamespace(_openbridge_jwt="ctx-token")
-
-    def fail_get_auth():
-        raise AssertionError("get_auth should not be called when ctx JWT is available")
 
-    monkeypatch.setattr(base, "get_auth", fail_get_auth)
+class _StateCtx:
+    def get_state(self, key):
+        assert key == "jwt_token"
+        return "ctx-token"
 
-    headers = base.get_auth_headers(ctx)
-
-    assert headers == {"Authorization": "Bearer ctx-token"}
-
-
-def test_get_auth_headers_uses_context_get_state(monkeypatch):
-    class Ctx:
-        def get_state(self, key):
-            assert key == "jwt_token"
-            return "ctx-token"
 
+@pytest.mark.parametrize(
+    "ctx",
+    [SimpleNamespace(_openbridge_jwt="ctx-token"), _StateCtx()],
+    ids=["jwt-attribute", "get-state"],
+)
+def test_get_auth_headers_prefers_context_jwt(monkeypatch, ctx):
     def fail_get_auth():
         raise AssertionError("get_auth should not be called when ctx JWT is available")
 
     monkeypatch.setattr(base, "get_auth", fail_get_auth)
 
-    headers = base.get_auth_headers(Ctx())
+    headers = base.get_auth_headers(ctx)
 
     assert headers == {"Authorization": "Bearer ctx-token"}
 
-def test_get_auth_headers_raises_on_conversion_failure(monkeypatch):
+
+def test_get_auth_headers_raises_on_conversion_failure(monkeypatch, fake_refresh_post):
     monkeypatch.setenv("OPENBRIDGE_REFRESH_TOKEN", "abc:def")
 
     def fake_post(*args, **kwargs):
         raise RuntimeError("network failure")
 
-    monkeypatch.setattr("src.auth.simple.requests.post", fake_post)
-    monkeypatch.setattr("src.auth.simple._AUTH_INSTANCE", None)
+    fake_refresh_post(fake_post)
 
     try:
         base.get_auth_headers()
         assert False, "Expected AuthenticationError"
     except AuthenticationError as exc:
         assert "Failed to convert OPENBRIDGE_REFRESH_TOKEN to JWT" in str(exc)
+
+
+def test_decode_json_parses_raw_bytes():
+    response = SimpleNamespace(content=b'{"data": [{"id": 1}]}')
+
+    assert base.decode_json(response) == {"data": [{"id": 1}]}
+
+
+def test_decode_json_raises_requests_decode_error():
+    response = SimpleNamespace(content=b"<html>Bad Gateway</html>")
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        base.decode_json(response)
+
+
+def test_get_http_session_reuses_pooled_session(monkeypatch):
+    monkeypatch.setattr(base, "_HTTP_SESSION", None)
+
+    session = base.get_http_session()
+
+    assert base.get_http_session() is session
+    adapter = session.get_adapter("https://service.api.openbridge.io")
+    assert adapter.max_retries.total == 3
+    assert 502 in adapter.max_retries.status_forcelist
+    assert 429 in adapter.max_retries.status_forcelist
+    assert adapter.max_retries.respect_retry_after_header is True
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+def test_iter_json_pages_fetches_advertised_pages_concurrently():
+    base_url = "https://remote-identity.api.openbridge.io"
+    requested = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        requested.append(url)
+        page = int(url.rsplit("page=", 1)[1])
+        return SimpleNamespace(
+            status_code=200,
+            content=orjson.dumps({
+                "data": [{"id": page}],
+                "links": {"next": f"{base_url}/ri?page={page + 1}"},
+                "meta": {"pagination": {"page": page, "pages": 3}},
+            }),
+        )
+
+    pages = base.iter_json_pages(
+        SimpleNamespace(get=fake_get),
+        f"{base_url}/ri?page=1",
+        base_url=base_url,
+        headers={},
+    )
+
+    assert [payload["data"][0]["id"] for _, payload in pages] == [1, 2, 3]
+    assert sorted(requested) == [f"{base_url}/ri?page={page}" for page in (1, 2, 3)]
+
+
+def test_iter_json_pages_respects_max_pages_when_following_links():
+    base_url = "https://subscriptions.api.openbridge.io"
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        page = int(url.rsplit("page=", 1)[1])
+        return SimpleNamespace(
+            status_code=200,
+            content=orjson.dumps({"data": [page], "links": {"next": f"{base_url}/sub?page={page + 1}"}}),
+        )
+
+    pages = base.iter_json_pages(
+        SimpleNamespace(get=fake_get),
+        f"{base_url}/sub?page=1",
+        base_url=base_url,
+        headers={},
+        max_pages=2,
+    )
+
+    assert [payload["data"] for _, payload in pages] == [[1], [2]]
+
+
+def test_get_async_client_reuses_managed_client(monkeypatch):
+    monkeypatch.setenv("OPENBRIDGE_API_TIMEOUT", "45")
+
+    async def fetch_clients():
+        return await base.get_async_client(), await base.get_async_client()
+
+    first, second = asyncio.run(fetch_clients())
+
+    assert first is second
+    assert first.timeout.read == 45
+
+
+def test_decode_json_async_parses_large_bodies_off_loop(monkeypatch):
+    monkeypatch.setattr(base, "LARGE_RESPONSE_BYTES", 8)
+    threads = []
+
+    async def offload(func, *args):
+        threads.append(func)
+        return func(*args)
+
+    monkeypatch.setattr(base.asyncio, "to_thread", offload)
+
+    small = asyncio.run(base.decode_json_async(SimpleNamespace(content=b"{}")))
+    large = asyncio.run(base.decode_json_async(SimpleNamespace(content=b'{"data": [1, 2, 3]}')))
+
+    assert small == {}
+    assert large == {"data": [1, 2, 3]}
+    assert threads == [base.decode_json]
+
+
+def test_singleflight_shares_one_call_per_key():
+    calls = []
+
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0)
+        return value
+
+    async def run():
+        shared = await asyncio.gather(
+            base.singleflight("a", lambda: fetch(1)),
+            base.singleflight("a", lambda: fetch(2)),
+            base.singleflight("b", lambda: fetch(3)),
+        )
+        later = await base.singleflight("a", lambda: fetch(4))
+        return shared, later
+
+    shared, later = asyncio.run(run())
+
+    assert shared == [1, 1, 3]
+    assert later == 4
+    assert calls == [1, 3, 4]
+    assert base._IN_FLIGHT == {}
+
+
+def test_get_json_revalidated_sends_validators_and_reuses_on_304():
+    url = "https://service.api.openbridge.io/service/rules/prod/v1/rules/search"
+    requests_seen = []
+    responses = [
+        SimpleNamespace(status_code=200, headers={"ETag": '"v1"'}, content=b'{"data": [1]}'),
+        SimpleNamespace(status_code=304, headers={"ETag": '"v1"'}, content=b""),
+    ]
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        requests_seen.append(headers)
+        return responses.pop(0)
+
+    session = SimpleNamespace(get=fake_get)
+    headers = {"Authorization": "Bearer a"}
+
+    first = base.get_json_revalidated(session, url, params={"path": "x"}, headers=headers)
+    second = base.get_json_revalidated(session, url, params={"path": "x"}, headers=headers)
+
+    assert first == second == (200, {"data": [1]})
+    assert "If-None-Match" not in requests_seen[0]
+    assert requests_seen[1]["If-None-Match"] == '"v1"'
+
+
+def test_get_json_revalidated_serves_fresh_entries_without_request():
+    url = "https://service.api.openbridge.io/service/rules/prod/v1/rules/search"
+    calls = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        calls.append(headers["Authorization"])
+        return SimpleNamespace(
+            status_code=200,
+            headers={"Cache-Control": "max-age=300"},
+            content=b'{"data": []}',
+        )
+
+    session = SimpleNamespace(get=fake_get)
+
+    base.get_json_revalidated(session, url, headers={"Authorization": "Bearer a"})
+    base.get_json_revalidated(session, url, headers={"Authorization": "Bearer a"})
+    base.get_json_revalidated(session, url, headers={"Authorization": "Bearer b"})
+
+    assert calls == ["Bearer a", "Bearer b"]
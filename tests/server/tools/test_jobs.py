@@ -2,25 +2,26 @@
 
 from types import SimpleNamespace
 
+import orjson
 import pytest
 import requests
 
 from src.server.tools import jobs
+from tests.server.tools._fakes import FakeResponse
 
+_JOB_CREATED_RESPONSE = FakeResponse(200, {"data": {"attributes": {"job_id": "12345", "status": "pending"}}})
+_JOBS_RESPONSE = FakeResponse(200, {"data": [{"id": 1, "status": "active"}, {"id": 2, "status": "active"}]})
 
-@pytest.fixture
-def mock_auth_headers(monkeypatch):
-    """Mock get_auth_headers to return valid auth headers."""
-    monkeypatch.setattr(
-        "src.server.tools.jobs.get_auth_headers",
-        lambda ctx=None: {"Authorization": "Bearer valid.jwt.token"},
-    )
+_STAGE_JOB_RESPONSES = tuple(
+    FakeResponse(200, {"data": {"attributes": {"job_id": f"job-{stage_id}", "stage_id": stage_id}}})
+    for stage_id in (1, 2, 3)
+)
 
 
 @pytest.fixture
 def mock_history_api_url(monkeypatch):
     """Mock HISTORY_API_BASE_URL environment variable."""
-    monkeypatch.setenv("HISTORY_API_BASE_URL", "https://history.api.test")
+    monkeypatch.setattr(jobs, "HISTORY_API_BASE_URL", "https://history.api.test")
 
 
 class TestCreateJob:
@@ -28,21 +29,11 @@ class TestCreateJob:
 
     def test_returns_job_data_on_success(self, monkeypatch, mock_auth_headers, mock_history_api_url):
         """When API call succeeds, returns job data."""
-        def fake_post(url, headers=None, json=None, timeout=None):
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": {
-                        "attributes": {
-                            "job_id": "12345",
-                            "status": "pending",
-                        }
-                    }
-                },
-            )
-
-        monkeypatch.setattr("src.server.tools.jobs.requests.post", fake_post)
+        def fake_post(url, headers=None, data=None, timeout=None):
+            assert headers["Content-Type"] == "application/json"
+            return _JOB_CREATED_RESPONSE
+
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(post=fake_post))
 
         result = jobs.create_job(
             subscription_id=123,
@@ -57,10 +48,10 @@ class TestCreateJob:
 
     def test_handles_request_exception_with_no_response(self, monkeypatch, mock_auth_headers, mock_history_api_url):
         """When requests raises exception before response, uses exception message."""
-        def fake_post(url, headers=None, json=None, timeout=None):
+        def fake_post(url, headers=None, data=None, timeout=None):
             raise requests.RequestException("Connection refused")
 
-        monkeypatch.setattr("src.server.tools.jobs.requests.post", fake_post)
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(post=fake_post))
 
         result = jobs.create_job(
             subscription_id=123,
@@ -75,17 +66,10 @@ class TestCreateJob:
 
     def test_handles_request_exception_with_response_text(self, monkeypatch, mock_auth_headers, mock_history_api_url):
         """When response exists but raises on status check, uses response text."""
-        def fake_post(url, headers=None, json=None, timeout=None):
-            response = SimpleNamespace(
-                status_code=400,
-                text='{"error": "Bad request: invalid date format"}',
-            )
-            response.raise_for_status = lambda: (_ for _ in ()).throw(
-                requests.HTTPError("400 Client Error")
-            )
-            return response
-
-        monkeypatch.setattr("src.server.tools.jobs.requests.post", fake_post)
+        def fake_post(url, headers=None, data=None, timeout=None):
+            return FakeResponse(400, text='{"error": "Bad request: invalid date format"}')
+
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(post=fake_post))
 
         result = jobs.create_job(
             subscription_id=123,
@@ -100,24 +84,14 @@ class TestCreateJob:
 
     def test_creates_jobs_for_multiple_stage_ids(self, monkeypatch, mock_auth_headers, mock_history_api_url):
         """When multiple stage_ids provided, creates job for each."""
-        call_count = [0]
-
-        def fake_post(url, headers=None, json=None, timeout=None):
-            call_count[0] += 1
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": {
-                        "attributes": {
-                            "job_id": f"job-{call_count[0]}",
-                            "stage_id": json["data"]["attributes"]["stage_id"],
-                        }
-                    }
-                },
-            )
-
-        monkeypatch.setattr("src.server.tools.jobs.requests.post", fake_post)
+        responses = list(_STAGE_JOB_RESPONSES)
+        posted_stage_ids = []
+
+        def fake_post(url, headers=None, data=None, timeout=None):
+            posted_stage_ids.append(orjson.loads(data)["data"]["attributes"]["stage_id"])
+            return responses.pop(0)
+
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(post=fake_post))
 
         result = jobs.create_job(
             subscription_id=123,
@@ -126,8 +100,8 @@ class TestCreateJob:
             stage_ids=[1, 2, 3],
         )
 
-        assert len(result) == 3
-        assert call_count[0] == 3
+        assert posted_stage_ids == [1, 2, 3]
+        assert [job["job_id"] for job in result] == ["job-1", "job-2", "job-3"]
 
 
 class TestGetJobs:
@@ -135,21 +109,12 @@ class TestGetJobs:
 
     def test_returns_jobs_on_success(self, monkeypatch, mock_auth_headers):
         """When API call succeeds, returns job list."""
-        monkeypatch.setattr("src.server.tools.jobs.JOBS_API_BASE_URL", "https://jobs.api.test")
+        monkeypatch.setattr(jobs, "JOBS_API_BASE_URL", "https://jobs.api.test")
 
         def fake_get(url, headers=None, params=None, timeout=None):
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {"id": 1, "status": "active"},
-                        {"id": 2, "status": "active"},
-                    ]
-                },
-            )
-
-        monkeypatch.setattr("src.server.tools.jobs.requests.get", fake_get)
+            return _JOBS_RESPONSE
+
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = jobs.get_jobs(subscription_id=123)
 
@@ -158,12 +123,12 @@ class TestGetJobs:
 
     def test_returns_empty_list_on_request_error(self, monkeypatch, mock_auth_headers):
         """When requests raises exception, returns empty list."""
-        monkeypatch.setattr("src.server.tools.jobs.JOBS_API_BASE_URL", "https://jobs.api.test")
+        monkeypatch.setattr(jobs, "JOBS_API_BASE_URL", "https://jobs.api.test")
 
         def fake_get(url, headers=None, params=None, timeout=None):
             raise requests.RequestException("Connection failed")
 
-        monkeypatch.setattr("src.server.tools.jobs.requests.get", fake_get)
+        monkeypatch.setattr(jobs, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = jobs.get_jobs(subscription_id=123)
 
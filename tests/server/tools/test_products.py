@@ -1,45 +1,52 @@
-from types import SimpleNamespace
+import pytest
 
 from src.server.tools import products
-
-
-def test_search_products_finds_matches(monkeypatch):
+from tests.server.tools._fakes import FakeResponse
+
+_SPONSORED_BRANDS = {
+    "id": "50",
+    "attributes": {"name": "Amazon Ads - Sponsored Brands", "worker_name": "amzadsponsoredbrands"},
+}
+_SPONSORED_PRODUCTS = {
+    "id": "48",
+    "attributes": {"name": "Amazon Ads - Sponsored Products", "worker_name": "amzadsponsoredproducts"},
+}
+_FACEBOOK_INSIGHTS = {
+    "id": "2",
+    "attributes": {"name": "Facebook Page Insights", "worker_name": "fbinsights"},
+}
+_PRODUCTS_RESPONSE = FakeResponse(200, {
+    "data": [_SPONSORED_BRANDS, _SPONSORED_PRODUCTS, _FACEBOOK_INSIGHTS],
+    "links": {"next": None},
+})
+_SPONSORED_BRANDS_RESPONSE = FakeResponse(200, {"data": [_SPONSORED_BRANDS], "links": {"next": None}})
+_FACEBOOK_RESPONSE = FakeResponse(200, {"data": [_FACEBOOK_INSIGHTS], "links": {"next": None}})
+_SEARCH_PAGES = (
+    FakeResponse(200, {
+        "data": [{"id": "1", "attributes": {"name": "Amazon Product 1", "worker_name": "amz1"}}],
+        "links": {"next": "https://product.test?page=2"},
+    }),
+    FakeResponse(200, {
+        "data": [{"id": "2", "attributes": {"name": "Amazon Product 2", "worker_name": "amz2"}}],
+        "links": {"next": None},
+    }),
+)
+_SB_PAYLOADS_RESPONSE = FakeResponse(200, {
+    "data": [
+        {"id": "2184", "attributes": {"name": "amzn_ads_sb_campaigns", "stage_id": 1004}},
+        {"id": "2185", "attributes": {"name": "amzn_ads_sb_adgroups", "stage_id": 1004}},
+    ]
+})
+_EMPTY_SPM_RESPONSE = FakeResponse(200, {"data": []})
+
+
+def test_search_products_finds_matches(monkeypatch, mock_auth_headers):
     """Test that search_products finds matching products."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     def fake_get(url, params=None, headers=None, timeout=None):
         assert url == "https://product.test?page_size=1000" or url == "https://product.test"
-        return SimpleNamespace(
-            status_code=200,
-            raise_for_status=lambda: None,
-            json=lambda: {
-                "data": [
-                    {
-                        "id": "50",
-                        "attributes": {
-                            "name": "Amazon Ads - Sponsored Brands",
-                            "worker_name": "amzadsponsoredbrands",
-                        }
-                    },
-                    {
-                        "id": "48",
-                        "attributes": {
-                            "name": "Amazon Ads - Sponsored Products",
-                            "worker_name": "amzadsponsoredproducts",
-                        }
-                    },
-                    {
-                        "id": "2",
-                        "attributes": {
-                            "name": "Facebook Page Insights",
-                            "worker_name": "fbinsights",
-                        }
-                    },
-                ],
-                "links": {"next": None}
-            },
-        )
+        return _PRODUCTS_RESPONSE
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -51,66 +58,27 @@ def test_search_products_finds_matches(monkeypatch):
     assert results[1]["id"] == 48
 
 
-def test_search_products_case_insensitive(monkeypatch):
+@pytest.mark.parametrize("query", ["amazon ads", "AMAZON ADS", "AmAzOn AdS"])
+def test_search_products_case_insensitive(monkeypatch, mock_auth_headers, query):
     """Test that search is case-insensitive."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     def fake_get(url, params=None, headers=None, timeout=None):
-        return SimpleNamespace(
-            status_code=200,
-            raise_for_status=lambda: None,
-            json=lambda: {
-                "data": [
-                    {
-                        "id": "50",
-                        "attributes": {
-                            "name": "Amazon Ads - Sponsored Brands",
-                            "worker_name": "amzadsponsoredbrands",
-                        }
-                    },
-                ],
-                "links": {"next": None}
-            },
-        )
+        return _SPONSORED_BRANDS_RESPONSE
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
-    # Test lowercase query
-    results = products.search_products("amazon ads")
-    assert len(results) == 1
-
-    # Test uppercase query
-    results = products.search_products("AMAZON ADS")
-    assert len(results) == 1
+    results = products.search_products(query)
 
-    # Test mixed case
-    results = products.search_products("AmAzOn AdS")
     assert len(results) == 1
 
 
-def test_search_products_no_matches(monkeypatch):
+def test_search_products_no_matches(monkeypatch, mock_auth_headers):
     """Test that search_products returns empty list when no matches."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     def fake_get(url, params=None, headers=None, timeout=None):
-        return SimpleNamespace(
-            status_code=200,
-            raise_for_status=lambda: None,
-            json=lambda: {
-                "data": [
-                    {
-                        "id": "2",
-                        "attributes": {
-                            "name": "Facebook Page Insights",
-                            "worker_name": "fbinsights",
-                        }
-                    },
-                ],
-                "links": {"next": None}
-            },
-        )
+        return _FACEBOOK_RESPONSE
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -119,36 +87,14 @@ def test_search_products_no_matches(monkeypatch):
     assert results == []
 
 
-def test_list_product_tables_by_product_id(monkeypatch):
+def test_list_product_tables_by_product_id(monkeypatch, mock_auth_headers):
     """Test listing tables for a product by ID."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     def fake_get(url, params=None, headers=None, timeout=None):
         assert url == "https://product.test/50/payloads"
         assert params == {"stage_id__gte": 1000}
-        return SimpleNamespace(
-            status_code=200,
-            raise_for_status=lambda: None,
-            json=lambda: {
-                "data": [
-                    {
-                        "id": "2184",
-                        "attributes": {
-                            "name": "amzn_ads_sb_campaigns",
-                            "stage_id": 1004,
-                        }
-                    },
-                    {
-                        "id": "2185",
-                        "attributes": {
-                            "name": "amzn_ads_sb_adgroups",
-                            "stage_id": 1004,
-                        }
-                    },
-                ]
-            },
-        )
+        return _SB_PAYLOADS_RESPONSE
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -160,9 +106,8 @@ def test_list_product_tables_by_product_id(monkeypatch):
     assert results[0]["id"] == 2184
 
 
-def test_list_product_tables_with_subscription(monkeypatch):
+def test_list_product_tables_with_subscription(monkeypatch, mock_auth_headers):
     """Test listing tables filtered by subscription's stage_ids."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
     monkeypatch.setattr(products, "SUBSCRIPTIONS_API_BASE_URL", "https://subscriptions.test")
 
@@ -172,53 +117,45 @@ def test_list_product_tables_with_subscription(monkeypatch):
         if "spm" in url:
             call_count["spm"] += 1
             assert params == {"subscription": 128853, "data_key": "stage_ids"}
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {
-                            "attributes": {
-                                "product": {"id": 50},
-                                "data_value": "[1004, 1005]",
-                            }
+            return FakeResponse(200, {
+                "data": [
+                    {
+                        "attributes": {
+                            "product": {"id": 50},
+                            "data_value": "[1004, 1005]",
                         }
-                    ]
-                },
-            )
+                    }
+                ]
+            })
         elif "payloads" in url:
             call_count["payloads"] += 1
             assert url == "https://product.test/50/payloads"
             assert params == {"stage_id__gte": 1000}
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {
-                            "id": "2184",
-                            "attributes": {
-                                "name": "amzn_ads_sb_campaigns",
-                                "stage_id": 1004,
-                            }
-                        },
-                        {
-                            "id": "2185",
-                            "attributes": {
-                                "name": "amzn_ads_sb_adgroups",
-                                "stage_id": 1005,
-                            }
-                        },
-                        {
-                            "id": "2186",
-                            "attributes": {
-                                "name": "amzn_ads_sb_keywords",
-                                "stage_id": 9999,  # Not in subscription's stage_ids
-                            }
-                        },
-                    ]
-                },
-            )
+            return FakeResponse(200, {
+                "data": [
+                    {
+                        "id": "2184",
+                        "attributes": {
+                            "name": "amzn_ads_sb_campaigns",
+                            "stage_id": 1004,
+                        }
+                    },
+                    {
+                        "id": "2185",
+                        "attributes": {
+                            "name": "amzn_ads_sb_adgroups",
+                            "stage_id": 1005,
+                        }
+                    },
+                    {
+                        "id": "2186",
+                        "attributes": {
+                            "name": "amzn_ads_sb_keywords",
+                            "stage_id": 9999,  # Not in subscription's stage_ids
+                        }
+                    },
+                ]
+            })
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -231,9 +168,8 @@ def test_list_product_tables_with_subscription(monkeypatch):
     assert results[1]["name"] == "amzn_ads_sb_adgroups"
 
 
-def test_list_product_tables_subscription_fallback(monkeypatch):
+def test_list_product_tables_subscription_fallback(monkeypatch, mock_auth_headers):
     """Test fallback to legacy subscription path when /spm returns empty."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
     monkeypatch.setattr(products, "SUBSCRIPTIONS_API_BASE_URL", "https://subscriptions.test")
 
@@ -243,44 +179,32 @@ def test_list_product_tables_subscription_fallback(monkeypatch):
         if "spm" in url:
             call_count["spm"] += 1
             # Return empty data to trigger fallback
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {"data": []},
-            )
+            return _EMPTY_SPM_RESPONSE
         elif "/sub/" in url:
             call_count["sub"] += 1
             assert url == "https://subscriptions.test/sub/100239"
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": {
-                        "attributes": {
-                            "product_id": 2,
-                        }
+            return FakeResponse(200, {
+                "data": {
+                    "attributes": {
+                        "product_id": 2,
                     }
-                },
-            )
+                }
+            })
         elif "payloads" in url:
             call_count["payloads"] += 1
             assert url == "https://product.test/2/payloads"
             assert params == {"stage_id__gte": 1000}
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {
-                            "id": "100",
-                            "attributes": {
-                                "name": "fb_insights_page",
-                                "stage_id": 0,
-                            }
-                        },
-                    ]
-                },
-            )
+            return FakeResponse(200, {
+                "data": [
+                    {
+                        "id": "100",
+                        "attributes": {
+                            "name": "fb_insights_page",
+                            "stage_id": 0,
+                        }
+                    },
+                ]
+            })
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -294,9 +218,8 @@ def test_list_product_tables_subscription_fallback(monkeypatch):
     assert results[0]["stage_id"] == 0
 
 
-def test_list_product_tables_error_handling(monkeypatch):
+def test_list_product_tables_error_handling(monkeypatch, mock_auth_headers):
     """Test error handling when API calls fail."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     def fake_get_fails(url, headers=None, timeout=None):
@@ -310,50 +233,15 @@ def test_list_product_tables_error_handling(monkeypatch):
     assert "error" in results[0]
 
 
-def test_search_products_pagination(monkeypatch):
+def test_search_products_pagination(monkeypatch, mock_auth_headers):
     """Test that search_products handles pagination correctly."""
-    monkeypatch.setattr(products, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
     monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
 
     call_count = {"page": 0}
 
     def fake_get(url, params=None, headers=None, timeout=None):
         call_count["page"] += 1
-
-        if call_count["page"] == 1:
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {
-                            "id": "1",
-                            "attributes": {
-                                "name": "Amazon Product 1",
-                                "worker_name": "amz1",
-                            }
-                        },
-                    ],
-                    "links": {"next": "https://product.test?page=2"}
-                },
-            )
-        else:
-            return SimpleNamespace(
-                status_code=200,
-                raise_for_status=lambda: None,
-                json=lambda: {
-                    "data": [
-                        {
-                            "id": "2",
-                            "attributes": {
-                                "name": "Amazon Product 2",
-                                "worker_name": "amz2",
-                            }
-                        },
-                    ],
-                    "links": {"next": None}
-                },
-            )
+        return _SEARCH_PAGES[call_count["page"] - 1]
 
     monkeypatch.setattr(products.requests, "get", fake_get)
 
@@ -361,3 +249,38 @@ def test_search_products_pagination(monkeypatch):
 
     assert call_count["page"] == 2
     assert len(results) == 2
+
+
+def test_list_product_tables_refetches_on_product_mismatch(monkeypatch, mock_auth_headers):
+    """Test payloads are refetched for the subscription's product when IDs differ."""
+    monkeypatch.setattr(products, "PRODUCT_API_BASE_URL", "https://product.test")
+    monkeypatch.setattr(products, "SUBSCRIPTIONS_API_BASE_URL", "https://subscriptions.test")
+
+    payload_urls = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        if "spm" in url:
+            return FakeResponse(200, {
+                "data": [
+                    {
+                        "attributes": {
+                            "product": {"id": 48},
+                            "data_value": "[1004]",
+                        }
+                    }
+                ]
+            })
+        payload_urls.append(url)
+        return FakeResponse(200, {
+            "data": [
+                {"id": "1", "attributes": {"name": "sp_campaigns", "stage_id": 1004}},
+                {"id": "2", "attributes": {"name": "sp_keywords", "stage_id": 1005}},
+            ]
+        })
+
+    monkeypatch.setattr(products.requests, "get", fake_get)
+
+    results = products.list_product_tables(product_id=50, subscription_id=128853)
+
+    assert sorted(payload_urls) == ["https://product.test/48/payloads", "https://product.test/50/payloads"]
+    assert results == [{"name": "sp_campaigns", "stage_id": 1004, "id": 1}]
@@ -1,83 +1,140 @@
+import asyncio
 from types import SimpleNamespace
 
+
 from src.server.tools import remote_identity
+from tests.server.tools._fakes import FakeResponse
+
+_IDENTITY_PAGES = (
+    FakeResponse(200, {
+        "data": [{"id": "ri-1"}],
+        "links": {"next": "https://remote-identity.api.openbridge.io/ri?page=2"},
+    }),
+    FakeResponse(200, {"data": [{"id": "ri-2"}], "links": {"next": None}}),
+)
+_IDENTITY_42_RESPONSE = FakeResponse(200, {"data": {"id": "42", "attributes": {"region": "na"}}})
+_SERVER_ERROR_RESPONSE = FakeResponse(500, {})
+_NOT_FOUND_RESPONSE = FakeResponse(404, {})
 
 
-def test_get_remote_identities_paginates(monkeypatch):
-    monkeypatch.setattr(remote_identity, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
-
-    responses = [
-        SimpleNamespace(
-            status_code=200,
-            json=lambda: {
-                "data": [{"id": "ri-1"}],
-                "links": {"next": "https://remote-identity.api.openbridge.io/ri?page=2"},
-            },
-        ),
-        SimpleNamespace(
-            status_code=200,
-            json=lambda: {
-                "data": [{"id": "ri-2"}],
-                "links": {"next": None},
-            },
-        ),
-    ]
+def test_get_remote_identities_paginates(monkeypatch, mock_auth_headers):
+
+    responses = list(_IDENTITY_PAGES)
 
     def fake_get(url, headers=None, params=None, timeout=None):
-        assert headers == {"Authorization": "token"}
+        assert headers == mock_auth_headers
         return responses.pop(0)
 
-    monkeypatch.setattr(remote_identity.requests, "get", fake_get)
+    monkeypatch.setattr(remote_identity, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
     identities = remote_identity.get_remote_identities()
 
     assert identities == [{"id": "ri-1"}, {"id": "ri-2"}]
 
 
-def test_get_remote_identities_stops_on_failure(monkeypatch):
-    monkeypatch.setattr(remote_identity, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
+def test_get_remote_identities_stops_on_failure(monkeypatch, mock_auth_headers):
 
     def fake_get(url, headers=None, params=None, timeout=None):
-        return SimpleNamespace(status_code=500, json=lambda: {})
+        return _SERVER_ERROR_RESPONSE
 
-    monkeypatch.setattr(remote_identity.requests, "get", fake_get)
+    monkeypatch.setattr(remote_identity, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
     identities = remote_identity.get_remote_identities()
 
     assert identities == []
 
 
-def test_get_remote_identity_by_id_success(monkeypatch):
-    monkeypatch.setattr(remote_identity, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
+def test_get_remote_identity_by_id_success(monkeypatch, mock_auth_headers):
 
-    def fake_get(url, headers=None, timeout=None):
+    async def fake_get(url, headers=None):
         assert url.endswith("/sri/42")
-        return SimpleNamespace(
-            status_code=200,
-            json=lambda: {
-                "data": {
-                    "id": "42",
-                    "attributes": {"region": "na", "status": "active"},
-                    "relationships": {},
-                }
-            },
-        )
+        return FakeResponse(200, {
+            "data": {
+                "id": "42",
+                "attributes": {"region": "na", "status": "active"},
+                "relationships": {},
+            }
+        })
 
-    monkeypatch.setattr(remote_identity.requests, "get", fake_get)
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
 
-    identity = remote_identity.get_remote_identity_by_id("42")
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
+
+    identity = asyncio.run(remote_identity.get_remote_identity_by_id("42"))
 
     assert identity == {"id": "42", "relationships": {}, "region": "na", "status": "active"}
 
 
-def test_get_remote_identity_by_id_not_found(monkeypatch):
-    monkeypatch.setattr(remote_identity, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
+def test_get_remote_identity_by_id_not_found(monkeypatch, mock_auth_headers):
+
+    async def fake_get(url, headers=None):
+        return _NOT_FOUND_RESPONSE
 
-    def fake_get(url, headers=None, timeout=None):
-        return SimpleNamespace(status_code=404, json=lambda: {})
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
 
-    monkeypatch.setattr(remote_identity.requests, "get", fake_get)
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
 
-    identity = remote_identity.get_remote_identity_by_id("missing")
+    identity = asyncio.run(remote_identity.get_remote_identity_by_id("missing"))
 
     assert identity == {"error": "Remote identity missing not found."}
+
+
+def test_get_remote_identity_by_id_is_cached(monkeypatch, mock_auth_headers):
+    calls = []
+
+    async def fake_get(url, headers=None):
+        calls.append(url)
+        return _IDENTITY_42_RESPONSE
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
+
+    first = asyncio.run(remote_identity.get_remote_identity_by_id("42"))
+    first["region"] = "eu"
+    second = asyncio.run(remote_identity.get_remote_identity_by_id("42"))
+
+    assert second == {"id": "42", "region": "na"}
+    assert len(calls) == 1
+
+
+def test_get_remote_identity_by_id_without_attributes(monkeypatch, mock_auth_headers):
+
+    async def fake_get(url, headers=None):
+        return FakeResponse(200, {"data": {"id": "43"}})
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
+
+    assert asyncio.run(remote_identity.get_remote_identity_by_id("43")) == {"id": "43"}
+
+
+def test_get_remote_identity_by_id_coalesces_concurrent_calls(monkeypatch, mock_auth_headers):
+    calls = []
+
+    async def fake_get(url, headers=None):
+        calls.append(url)
+        await asyncio.sleep(0)
+        return _IDENTITY_42_RESPONSE
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
+
+    async def run():
+        return await asyncio.gather(
+            remote_identity.get_remote_identity_by_id("42"),
+            remote_identity.get_remote_identity_by_id("42"),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first == second == {"id": "42", "region": "na"}
+    assert first is not second
+    assert len(calls) == 1
@@ -1,17 +1,23 @@
 import asyncio
-from types import SimpleNamespace
+from types import MappingProxyType, SimpleNamespace
 
+import orjson
 import pytest
 
-from src.server.tools import service
+from src.server.tools import remote_identity, service
+from tests.server.tools._fakes import FakeResponse
 
+_AUTH_HEADERS = MappingProxyType({"Authorization": "token"})
 
-def test_validate_query_requires_context():
+
+@pytest.mark.asyncio
+async def test_validate_query_requires_context():
     with pytest.raises(ValueError):
-        asyncio.run(service.validate_query("select 1", key_name="acc"))
+        await service.validate_query("select 1", key_name="acc")
 
 
-def test_validate_query_requires_openai_key(monkeypatch):
+@pytest.mark.asyncio
+async def test_validate_query_requires_openai_key(monkeypatch):
     class DummyContext:
         async def sample(self, **kwargs):
             return SimpleNamespace(text="{}")
@@ -20,10 +26,11 @@ def test_validate_query_requires_openai_key(monkeypatch):
     monkeypatch.delenv("FASTMCP_SAMPLING_API_KEY", raising=False)
 
     with pytest.raises(ValueError):
-        asyncio.run(service.validate_query("select 1 limit 1", key_name="acc", ctx=DummyContext()))
+        await service.validate_query("select 1 limit 1", key_name="acc", ctx=DummyContext())
 
 
-def test_validate_query_allows_read_only_query(monkeypatch):
+@pytest.mark.asyncio
+async def test_validate_query_allows_read_only_query(monkeypatch):
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
     monkeypatch.setenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "true")
 
@@ -36,13 +43,7 @@ def test_validate_query_allows_read_only_query(monkeypatch):
             return SimpleNamespace(text='{"allow": true, "read_only": true}')
 
     ctx = DummyContext()
-    result = asyncio.run(
-        service.validate_query(
-            "SELECT * FROM example LIMIT 5",
-            key_name="acc",
-            ctx=ctx,
-        )
-    )
+    result = await service.validate_query("SELECT * FROM example LIMIT 5", key_name="acc", ctx=ctx)
 
     assert result["decision"]["allowed"] is True
     assert result["heuristics"]["has_limit"] is True
@@ -50,7 +51,8 @@ def test_validate_query_allows_read_only_query(monkeypatch):
     assert ctx.calls, "expected sampling to be invoked"
 
 
-def test_validate_query_denies_query_without_limit(monkeypatch):
+@pytest.mark.asyncio
+async def test_validate_query_denies_query_without_limit(monkeypatch):
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
     monkeypatch.setenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "true")
 
@@ -58,39 +60,66 @@ def test_validate_query_denies_query_without_limit(monkeypatch):
         async def sample(self, **kwargs):
             return SimpleNamespace(text='{"allow": true, "read_only": true}')
 
-    result = asyncio.run(
-        service.validate_query(
-            "SELECT id FROM dataset",
-            key_name="acc",
-            ctx=DummyContext(),
-        )
-    )
+    result = await service.validate_query("SELECT id FROM dataset", key_name="acc", ctx=DummyContext())
 
     assert result["decision"]["allowed"] is False
     assert "Query lacks a LIMIT clause" in result["heuristics"]["warnings"][0]
 
 
-def test_execute_query_returns_data_on_success(monkeypatch):
+@pytest.mark.asyncio
+async def test_execute_query_returns_data_on_success(monkeypatch):
     async def fake_validate_query(*args, **kwargs):
         return {"decision": {"allowed": True}}
 
     monkeypatch.setattr(service, "validate_query", fake_validate_query)
-    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
-    monkeypatch.setattr(service, "SERVICE_API_BASE_URL", "https://service.test")
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+    monkeypatch.setattr(service, "QUERY_ENDPOINT", "https://service.test/service/query/production/query")
 
-    def fake_post(url, json, headers, timeout):
+    async def fake_post(url, content, headers):
         assert url == "https://service.test/service/query/production/query"
-        assert json["data"]["attributes"]["query"] == "select 1"
-        return SimpleNamespace(status_code=200, json=lambda: {"data": [{"row": 1}]})
+        assert headers == {"Authorization": "token", "Content-Type": "application/json"}
+        assert orjson.loads(content)["data"]["attributes"]["query"] == "select 1"
+        return FakeResponse(200, {"data": [{"row": 1}]})
+
+    async def fake_client():
+        return SimpleNamespace(post=fake_post)
 
-    monkeypatch.setattr(service.requests, "post", fake_post)
+    monkeypatch.setattr(service, "get_async_client", fake_client)
 
-    rows = asyncio.run(service.execute_query("select 1", "acc", ctx=object()))
+    rows = await service.execute_query("select 1", "acc", ctx=object())
 
     assert rows == [{"row": 1}]
 
 
-def test_execute_query_short_circuits_on_failed_validation(monkeypatch):
+@pytest.mark.asyncio
+async def test_execute_query_resolves_auth_headers_once(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", raising=False)
+    header_calls = []
+
+    def fake_get_auth_headers(ctx=None):
+        header_calls.append(ctx)
+        return _AUTH_HEADERS
+
+    monkeypatch.setattr(service, "get_auth_headers", fake_get_auth_headers)
+
+    async def fake_post(url, content, headers):
+        return FakeResponse(200, {"data": []})
+
+    async def fake_client():
+        return SimpleNamespace(post=fake_post)
+
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+
+    ctx = object()
+    rows = await service.execute_query("SELECT id FROM dataset LIMIT 5", "acc", ctx=ctx)
+
+    assert rows == []
+    assert header_calls == [ctx]
+
+
+@pytest.mark.asyncio
+async def test_execute_query_short_circuits_on_failed_validation(monkeypatch):
     async def fake_validate_query(*args, **kwargs):
         return {
             "decision": {"allowed": False},
@@ -104,33 +133,31 @@ def test_execute_query_short_circuits_on_failed_validation(monkeypatch):
 
     monkeypatch.setattr(service, "get_auth_headers", fail_get_auth_headers)
 
-    def fail_post(*args, **kwargs):
-        pytest.fail("execute_query should not perform HTTP request on validation failure")
+    async def fail_client():
+        pytest.fail("execute_query should not create an HTTP client on validation failure")
 
-    monkeypatch.setattr(service.requests, "post", fail_post)
+    monkeypatch.setattr(service, "get_async_client", fail_client)
 
-    result = asyncio.run(service.execute_query("select 1", "acc", ctx=object()))
+    result = await service.execute_query("select 1", "acc", ctx=object())
 
     assert result == [{"error": "Query validation failed", "validation": {"decision": {"allowed": False}, "reason": "unsafe"}}]
 
 
 def test_get_suggested_table_names_returns_master_suffix(monkeypatch):
-    monkeypatch.setattr(service, "SERVICE_API_BASE_URL", "https://service.test")
-    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
+    monkeypatch.setattr(service, "RULES_SEARCH_ENDPOINT", "https://service.test/service/rules/prod/v1/rules/search")
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
 
     def fake_get(url, params=None, headers=None, timeout=None):
         assert url == "https://service.test/service/rules/prod/v1/rules/search"
         assert params == {"path": "path-query", "latest": "true"}
-        return SimpleNamespace(
-            json=lambda: {
-                "data": [
-                    {"attributes": {"path": "rules/catalog/product"}},
-                    {"attributes": {"path": "rules/catalog/order"}},
-                ]
-            }
-        )
+        return FakeResponse(200, {
+            "data": [
+                {"attributes": {"path": "rules/catalog/product"}},
+                {"attributes": {"path": "rules/catalog/order"}},
+            ]
+        })
 
-    monkeypatch.setattr(service.requests, "get", fake_get)
+    monkeypatch.setattr(service, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
     names = service.get_suggested_table_names("path-query")
 
@@ -138,28 +165,27 @@ def test_get_suggested_table_names_returns_master_suffix(monkeypatch):
 
 
 def test_get_table_schema_strips_master_suffix(monkeypatch):
-    monkeypatch.setattr(service, "SERVICE_API_BASE_URL", "https://service.test")
-    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: {"Authorization": "token"})
-
-    def fake_get(url, headers=None, timeout=None):
-        assert url == "https://service.test/service/rules/prod/v1/rules/search?path=orders&latest=true"
-        return SimpleNamespace(
-            status_code=200,
-            json=lambda: {
-                "data": [
-                    {"attributes": {"path": "catalog/orders"}},
-                ]
-            },
-        )
+    monkeypatch.setattr(service, "RULES_SEARCH_ENDPOINT", "https://service.test/service/rules/prod/v1/rules/search")
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        assert url == "https://service.test/service/rules/prod/v1/rules/search"
+        assert params == {"path": "orders", "latest": "true"}
+        return FakeResponse(200, {
+            "data": [
+                {"attributes": {"path": "catalog/orders"}},
+            ]
+        })
 
-    monkeypatch.setattr(service.requests, "get", fake_get)
+    monkeypatch.setattr(service, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
     rules = service.get_table_schema("orders_master")
 
     assert rules == {"attributes": {"path": "catalog/orders"}}
 
 
-def test_execute_query_denies_on_validation_error(monkeypatch):
+@pytest.mark.asyncio
+async def test_execute_query_denies_on_validation_error(monkeypatch):
     """When validate_query raises ValueError, execute_query should deny (fail-closed)."""
     async def raise_validation_error(*args, **kwargs):
         raise ValueError("Sampling API key required")
@@ -171,14 +197,245 @@ def test_execute_query_denies_on_validation_error(monkeypatch):
 
     monkeypatch.setattr(service, "get_auth_headers", fail_get_auth_headers)
 
-    def fail_post(*args, **kwargs):
-        pytest.fail("execute_query should not perform HTTP request on validation error")
+    async def fail_client():
+        pytest.fail("execute_query should not create an HTTP client on validation error")
 
-    monkeypatch.setattr(service.requests, "post", fail_post)
+    monkeypatch.setattr(service, "get_async_client", fail_client)
 
-    result = asyncio.run(service.execute_query("select 1", "acc", ctx=object()))
+    result = await service.execute_query("select 1", "acc", ctx=object())
 
     assert len(result) == 1
     assert "error" in result[0]
     assert "Query validation unavailable" in result[0]["error"]
     assert result[0]["validation"] == "unavailable"
+
+
+@pytest.mark.asyncio
+async def test_get_amazon_advertising_profiles_fetches_identity_and_token_together(monkeypatch):
+    monkeypatch.setattr(service, "SERVICE_API_BASE_URL", "https://service.test")
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+
+    started = []
+    both_started = asyncio.Event()
+
+    async def fake_remote_identity(remote_identity_id, headers):
+        started.append("identity")
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return {"id": remote_identity_id, "region": "na"}
+
+    async def fake_get(url, headers=None):
+        if url.endswith("/service/amzadv/token/7"):
+            started.append("token")
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return FakeResponse(200, {"data": {"access_token": "amz-token", "client_id": "client"}})
+        assert url == "https://advertising-api.amazon.com/v2/profiles"
+        assert headers == {
+            "Authorization": "Bearer amz-token",
+            "Amazon-Advertising-API-ClientId": "client",
+        }
+        return FakeResponse(200, [{"profileId": 1}])
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(service, "resolve_remote_identity", fake_remote_identity)
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+
+    profiles = await service.get_amazon_advertising_profiles(7)
+
+    assert profiles == [{"profileId": 1}]
+    assert sorted(started) == ["identity", "token"]
+
+
+def test_scan_query_collects_all_heuristics_in_one_pass():
+    mutating, has_limit, select_star = service._scan_query(
+        "DELETE FROM t; SELECT * FROM updates WHERE x IN (SELECT id FROM t) LIMIT 10; drop table t"
+    )
+
+    assert mutating == ["delete", "drop"]
+    assert has_limit is True
+    assert select_star is True
+    assert service._scan_query("select id from t") == ([], False, False)
+
+
+@pytest.mark.asyncio
+async def test_get_amazon_api_access_token_is_cached_per_caller(monkeypatch):
+    monkeypatch.setattr(service, "SERVICE_API_BASE_URL", "https://service.test")
+    auth = {"Authorization": "Bearer tenant-a"}
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: dict(auth))
+    calls = []
+
+    async def fake_get(url, headers=None):
+        calls.append(headers["Authorization"])
+        return FakeResponse(200, {"data": {"access_token": f"amz-{len(calls)}", "client_id": "client"}})
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+
+    first = await service.get_amazon_api_access_token(7)
+    second = await service.get_amazon_api_access_token(7)
+    auth["Authorization"] = "Bearer tenant-b"
+    other_tenant = await service.get_amazon_api_access_token(7)
+
+    assert first == second == {"access_token": "amz-1", "client_id": "client"}
+    assert other_tenant["access_token"] == "amz-2"
+    assert calls == ["Bearer tenant-a", "Bearer tenant-b"]
+
+
+@pytest.mark.asyncio
+async def test_get_amazon_advertising_profiles_drops_rejected_token(monkeypatch):
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+    service._AMAZON_TOKEN_CACHE[("7", "token")] = {"access_token": "stale", "client_id": "client"}
+
+    async def fake_remote_identity(remote_identity_id, headers):
+        return {"id": remote_identity_id, "region": "na"}
+
+    async def fake_get(url, headers=None):
+        assert headers["Authorization"] == "Bearer stale"
+        return FakeResponse(401, {})
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(service, "resolve_remote_identity", fake_remote_identity)
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+
+    assert await service.get_amazon_advertising_profiles(7) == []
+    assert ("7", "token") not in service._AMAZON_TOKEN_CACHE
+
+
+
+@pytest.mark.asyncio
+async def test_validate_query_skips_sampling_when_heuristics_deny(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "true")
+
+    class DummyContext:
+        async def sample(self, **kwargs):
+            pytest.fail("sampling should be skipped when heuristics already deny")
+
+    result = await service.validate_query("DELETE FROM t LIMIT 1", key_name="acc", ctx=DummyContext())
+
+    assert result["decision"]["allowed"] is False
+    assert result["decision"]["sampling_allows"] is False
+    assert result["sampling"]["skipped"] == "heuristic_deny"
+
+
+@pytest.mark.asyncio
+async def test_validate_query_reuses_decision_for_repeated_query(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENBRIDGE_ENABLE_LLM_VALIDATION", "true")
+    calls = []
+
+    class DummyContext:
+        async def sample(self, **kwargs):
+            calls.append(kwargs)
+            await asyncio.sleep(0)
+            return SimpleNamespace(text='{"allow": true, "read_only": true}')
+
+    async def run_queries():
+        ctx = DummyContext()
+        concurrent = await asyncio.gather(
+            service.validate_query("SELECT id FROM t LIMIT 1", key_name="acc", ctx=ctx),
+            service.validate_query("SELECT id FROM t LIMIT 1", key_name="acc", ctx=ctx),
+        )
+        repeated = await service.validate_query("SELECT id\n  FROM t LIMIT 1", key_name="acc", ctx=ctx)
+        other_key = await service.validate_query("SELECT id FROM t LIMIT 1", key_name="other", ctx=ctx)
+        return concurrent, repeated, other_key
+
+    concurrent, repeated, other_key = await run_queries()
+
+    assert len(calls) == 2
+    assert all(result["decision"]["allowed"] for result in (*concurrent, repeated, other_key))
+    assert repeated["query"] == "SELECT id\n  FROM t LIMIT 1"
+
+
+def test_scan_query_is_case_insensitive_without_lowering():
+    mutating, has_limit, select_star = service._scan_query("Select * From t Where x = 'Update' Limit 5")
+
+    assert mutating == ["update"]
+    assert has_limit is True
+    assert select_star is True
+
+
+@pytest.mark.asyncio
+async def test_get_amazon_advertising_profiles_many_fans_out_per_identity(monkeypatch):
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+
+    async def fake_remote_identity(remote_identity_id, headers):
+        if remote_identity_id == 3:
+            return {"error": "Remote identity 3 not found."}
+        return {"id": remote_identity_id, "region": "eu" if remote_identity_id == 2 else "na"}
+
+    async def fake_token(remote_identity_id, headers):
+        return {"access_token": f"amz-{remote_identity_id}", "client_id": "client"}
+
+    async def fake_get(url, headers=None):
+        return FakeResponse(200, [{"url": url, "token": headers["Authorization"]}])
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(service, "resolve_remote_identity", fake_remote_identity)
+    monkeypatch.setattr(service, "_resolve_amazon_api_access_token", fake_token)
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+
+    profiles = await service.get_amazon_advertising_profiles_many([1, 2, 3, 1])
+
+    assert profiles == {
+        "1": [{"url": "https://advertising-api.amazon.com/v2/profiles", "token": "Bearer amz-1"}],
+        "2": [{"url": "https://advertising-api-eu.amazon.com/v2/profiles", "token": "Bearer amz-2"}],
+        "3": [],
+    }
+
+
+def test_get_table_schema_prefers_rule_matching_table_name(monkeypatch):
+    monkeypatch.setattr(service, "RULES_SEARCH_ENDPOINT", "https://service.test/search")
+    monkeypatch.setattr(service, "get_auth_headers", lambda ctx=None: _AUTH_HEADERS)
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        return FakeResponse(200, {
+            "data": [
+                {"attributes": {"path": "catalog/orders_archive"}},
+                {"attributes": {}},
+                {"attributes": {"path": "catalog/orders"}},
+            ]
+        })
+
+    monkeypatch.setattr(service, "get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+    assert service.get_table_schema("orders_master") == {"attributes": {"path": "catalog/orders"}}
+
+
+@pytest.mark.asyncio
+async def test_get_amazon_advertising_profiles_resolves_auth_headers_once(monkeypatch):
+    calls = []
+
+    def fake_auth_headers(ctx=None):
+        calls.append(ctx)
+        return _AUTH_HEADERS
+
+    async def fake_get(url, headers=None):
+        if "/sri/" in url:
+            return FakeResponse(200, {"data": {"id": "7", "attributes": {"region": "na"}}})
+        if "/amzadv/token/" in url:
+            return FakeResponse(200, {"data": {"access_token": "amz", "client_id": "client"}})
+        return FakeResponse(200, [{"profileId": 1}])
+
+    async def fake_client():
+        return SimpleNamespace(get=fake_get)
+
+    monkeypatch.setattr(service, "get_auth_headers", fake_auth_headers)
+    monkeypatch.setattr(service, "get_async_client", fake_client)
+    monkeypatch.setattr(remote_identity, "get_async_client", fake_client)
+
+    profiles = await service.get_amazon_advertising_profiles(7, ctx="ctx")
+
+    assert profiles == [{"profileId": 1}]
+    assert calls == ["ctx"]
@@ -1,19 +1,14 @@
 """Tests for subscriptions tool - covering edge cases and pagination."""
 
 from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 
 from src.server.tools import subscriptions
+from tests.server.tools._fakes import FakeResponse
 
-
-@pytest.fixture
-def mock_auth_headers(monkeypatch):
-    """Mock get_auth_headers to return valid auth headers."""
-    monkeypatch.setattr(
-        "src.server.tools.subscriptions.get_auth_headers",
-        lambda ctx=None: {"Authorization": "Bearer valid.jwt.token"},
-    )
+_NOT_FOUND_RESPONSE = FakeResponse(404, {})
 
 
 @pytest.fixture
@@ -25,21 +20,39 @@ def mock_subscriptions_api(monkeypatch):
     )
 
 
+@pytest.fixture
+def storage_router(monkeypatch):
+    """Serve a single storage and the given SPM entries, routed by URL path."""
+
+    def install(spm_data, key_name="test-key", name="Test Storage"):
+        routes = {
+            "/storages": FakeResponse(200, {
+                "data": [{"id": "sub-1", "attributes": {"storage_group_id": "sg-1"}}],
+                "included": [{"id": "sg-1", "attributes": {"key_name": key_name, "name": name}}],
+            }),
+            "/spm": FakeResponse(200, {"data": spm_data}),
+        }
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            return routes.get(urlparse(url).path, _NOT_FOUND_RESPONSE)
+
+        monkeypatch.setattr(subscriptions, "get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+    return install
+
+
 class TestGetSubscriptions:
     """Tests for get_subscriptions function."""
 
     def test_returns_subscriptions_on_success(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
         """When API call succeeds, returns subscription list."""
         def fake_get(url, headers=None, params=None, timeout=None):
-            return SimpleNamespace(
-                status_code=200,
-                json=lambda: {
-                    "data": [{"id": 1}, {"id": 2}],
-                    "links": {"next": None},
-                },
-            )
+            return FakeResponse(200, {
+                "data": [{"id": 1}, {"id": 2}],
+                "links": {"next": None},
+            })
 
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = subscriptions.get_subscriptions()
 
@@ -52,20 +65,12 @@ class TestGetSubscriptions:
 
         def fake_get(url, headers=None, params=None, timeout=None):
             page_count[0] += 1
-            return SimpleNamespace(
-                status_code=200,
-                json=lambda: {
-                    "data": [{"id": page_count[0]}],
-                    "links": {"next": "/next-page"},  # Always has next
-                },
-            )
+            return FakeResponse(200, {
+                "data": [{"id": page_count[0]}],
+                "links": {"next": "/next-page"},  # Always has next
+            })
 
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
-        # Override safe_pagination_url to always return a valid URL
-        monkeypatch.setattr(
-            "src.server.tools.subscriptions.safe_pagination_url",
-            lambda next_url, base_url: "/next-page" if next_url else None,
-        )
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = subscriptions.get_subscriptions()
 
@@ -76,55 +81,115 @@ class TestGetSubscriptions:
     def test_returns_empty_list_on_api_error(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
         """When API returns error status, returns empty list."""
         def fake_get(url, headers=None, params=None, timeout=None):
-            return SimpleNamespace(
-                status_code=500,
-                text="Internal Server Error",
-                json=lambda: {},
-            )
+            return FakeResponse(500, {}, text="Internal Server Error")
 
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = subscriptions.get_subscriptions()
 
         assert result == []
 
+    def test_parses_each_page_once(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """Each page body is decoded a single time."""
+        decoded = []
+
+        def counting_decode(response):
+            decoded.append(response)
+            return original_decode(response)
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            return FakeResponse(200, {"data": [{"id": 1}], "links": {"next": None}})
+
+        original_decode = subscriptions.decode_json
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+        monkeypatch.setattr("src.server.tools.base.decode_json", counting_decode)
+
+        assert subscriptions.get_subscriptions() == [{"id": 1}]
+        assert len(decoded) == 1
+
+    def test_fetches_advertised_pages_concurrently_in_order(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """When the first page reports the page count, later pages are requested up front and kept in order."""
+        requested = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            page = int(url.split("page=")[1].split("&")[0])
+            requested.append(page)
+            return FakeResponse(200, {
+                "data": [{"id": page}],
+                "meta": {"pagination": {"pages": 3}},
+            })
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_subscriptions()
+
+        assert [s["id"] for s in result] == [1, 2, 3]
+        assert sorted(requested) == [1, 2, 3]
+
+    def test_caps_advertised_pages_at_max_pages(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """A links.last hint beyond SUBSCRIPTIONS_MAX_PAGES fetches only the capped page range."""
+        requested = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            page = int(url.split("page=")[1].split("&")[0])
+            requested.append(page)
+            return FakeResponse(200, {
+                "data": [{"id": page}],
+                "links": {"last": "https://subscriptions.api.test/sub?page=50&page_size=1000"},
+            })
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_subscriptions()
+
+        expected = list(range(1, subscriptions.SUBSCRIPTIONS_MAX_PAGES + 1))
+        assert [s["id"] for s in result] == expected
+        assert sorted(requested) == expected
+
+
+class TestGetSubscriptionById:
+    """Tests for get_subscription_by_id function."""
+
+    def test_caches_subscription_per_caller(self, monkeypatch, mock_subscriptions_api):
+        """Repeated lookups reuse the cached subscription, but only for the same caller."""
+        calls = []
+        token = ["Bearer first"]
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            calls.append(headers["Authorization"])
+            return FakeResponse(200, {"data": {"id": "42"}})
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_auth_headers", lambda ctx=None: {"Authorization": token[0]})
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        first = subscriptions.get_subscription_by_id("42")
+        first["mutated"] = True
+        assert subscriptions.get_subscription_by_id("42") == {"id": "42"}
+        token[0] = "Bearer second"
+        subscriptions.get_subscription_by_id("42")
+
+        assert calls == ["Bearer first", "Bearer second"]
+
+    def test_does_not_cache_failures(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """Failed lookups are retried on the next call."""
+        calls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            calls.append(url)
+            return FakeResponse(500, {}, text="boom")
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        assert subscriptions.get_subscription_by_id("42") is None
+        assert subscriptions.get_subscription_by_id("42") is None
+        assert len(calls) == 2
 
 class TestGetStorageSubscriptions:
     """Tests for get_storage_subscriptions function."""
 
-    def test_handles_empty_spm_response(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+    def test_handles_empty_spm_response(self, storage_router, mock_auth_headers, mock_subscriptions_api):
         """When SPM response is empty, sets storage_type to 'unknown' without error."""
-        # Mock storages API response
-        def fake_get(url, headers=None, params=None, timeout=None):
-            if "storages" in url:
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {
-                        "data": [{
-                            "id": "sub-1",
-                            "attributes": {"storage_group_id": "sg-1"},
-                        }],
-                        "included": [{
-                            "id": "sg-1",
-                            "attributes": {"key_name": "test-key", "name": "Test Storage"},
-                        }],
-                    },
-                )
-            elif "spm" in url:
-                # Empty SPM response
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {"data": []},
-                )
-            return SimpleNamespace(
-                status_code=404,
-                raise_for_status=lambda: None,
-                json=lambda: {},
-            )
-
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
+        storage_router([])
 
         result = subscriptions.get_storage_subscriptions()
 
@@ -133,45 +198,19 @@ class TestGetStorageSubscriptions:
         assert result[0]["key_name"] == "test-key"
         assert result[0]["name"] == "Test Storage"
 
-    def test_extracts_storage_type_from_spm(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+    def test_extracts_storage_type_from_spm(self, storage_router, mock_auth_headers, mock_subscriptions_api):
         """When SPM has product name, maps it to storage type."""
-        def fake_get(url, headers=None, params=None, timeout=None):
-            if "storages" in url:
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {
-                        "data": [{
-                            "id": "sub-1",
-                            "attributes": {"storage_group_id": "sg-1"},
-                        }],
-                        "included": [{
-                            "id": "sg-1",
-                            "attributes": {"key_name": "bq-key", "name": "BQ Storage"},
-                        }],
-                    },
-                )
-            elif "spm" in url:
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {
-                        "data": [{
-                            "attributes": {
-                                "data_key": "dataset_id",
-                                "data_value": "my_dataset",
-                                "product": {"name": "Google BigQuery"},
-                            },
-                        }],
-                    },
-                )
-            return SimpleNamespace(
-                status_code=404,
-                raise_for_status=lambda: None,
-                json=lambda: {},
-            )
-
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
+        storage_router(
+            [{
+                "attributes": {
+                    "data_key": "dataset_id",
+                    "data_value": "my_dataset",
+                    "product": {"name": "Google BigQuery"},
+                },
+            }],
+            key_name="bq-key",
+            name="BQ Storage",
+        )
 
         result = subscriptions.get_storage_subscriptions()
 
@@ -179,48 +218,217 @@ class TestGetStorageSubscriptions:
         assert result[0]["storage_type"] == "bigquery"
         assert result[0]["dataset_id"] == "my_dataset"
 
-    def test_handles_missing_product_name(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+    def test_handles_missing_product_name(self, storage_router, mock_auth_headers, mock_subscriptions_api):
         """When SPM has data but no product name, sets storage_type to 'unknown'."""
+        # SPM with data but no product info
+        storage_router([{"attributes": {"data_key": "dataset_id", "data_value": "my_dataset"}}])
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert len(result) == 1
+        assert result[0]["storage_type"] == "unknown"
+
+    def test_fetches_spm_for_each_storage_in_order(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """SPM lookups fan out per storage and results keep the storage order."""
         def fake_get(url, headers=None, params=None, timeout=None):
             if "storages" in url:
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {
-                        "data": [{
-                            "id": "sub-1",
-                            "attributes": {"storage_group_id": "sg-1"},
-                        }],
-                        "included": [{
-                            "id": "sg-1",
-                            "attributes": {"key_name": "test-key", "name": "Test Storage"},
-                        }],
+                return FakeResponse(200, {
+                    "data": [
+                        {"id": f"sub-{i}", "attributes": {"storage_group_id": f"sg-{i}"}}
+                        for i in range(3)
+                    ],
+                    "included": [
+                        {"id": f"sg-{i}", "attributes": {"key_name": f"key-{i}", "name": f"Storage {i}"}}
+                        for i in range(3)
+                    ],
+                })
+            subscription_id = url.rsplit("=", 1)[1]
+            return FakeResponse(200, {
+                "data": [{
+                    "attributes": {
+                        "data_key": "dataset_id",
+                        "data_value": f"dataset-{subscription_id}",
+                        "product": {"name": "Snowflake"},
                     },
-                )
-            elif "spm" in url:
-                # SPM with data but no product info
-                return SimpleNamespace(
-                    status_code=200,
-                    raise_for_status=lambda: None,
-                    json=lambda: {
-                        "data": [{
-                            "attributes": {
-                                "data_key": "dataset_id",
-                                "data_value": "my_dataset",
-                                # No product field
-                            },
-                        }],
+                }],
+            })
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert [storage["subscription_id"] for storage in result] == ["sub-0", "sub-1", "sub-2"]
+        assert [storage["dataset_id"] for storage in result] == ["dataset-sub-0", "dataset-sub-1", "dataset-sub-2"]
+        assert {storage["storage_type"] for storage in result} == {"snowflake"}
+
+    @staticmethod
+    def _storages_response(count):
+        return FakeResponse(200, {
+            "data": [
+                {"id": f"sub-{i}", "attributes": {"storage_group_id": f"sg-{i}"}}
+                for i in range(count)
+            ],
+            "included": [
+                {"id": f"sg-{i}", "attributes": {"key_name": f"key-{i}", "name": f"Storage {i}"}}
+                for i in range(count)
+            ],
+        })
+
+    def test_fetches_spm_in_one_bulk_request(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """SPM entries for all storages come from one request and are grouped by subscription."""
+        monkeypatch.setattr(subscriptions, "SPM_BULK_LOOKUP", True)
+        spm_urls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            if "storages" in url:
+                return self._storages_response(2)
+            spm_urls.append(url)
+            return FakeResponse(200, {
+                "data": [
+                    {"attributes": {
+                        "subscription_id": "sub-1",
+                        "data_key": "dataset_id",
+                        "data_value": "dataset-1",
+                        "product": {"name": "GOOGLE BIGQUERY"},
+                    }},
+                    {
+                        "attributes": {
+                            "data_key": "dataset_id",
+                            "data_value": "dataset-0",
+                            "product": {"name": "Snowflake"},
+                        },
+                        "relationships": {"subscription": {"data": {"id": "sub-0"}}},
                     },
-                )
-            return SimpleNamespace(
-                status_code=404,
-                raise_for_status=lambda: None,
-                json=lambda: {},
-            )
+                ],
+            })
 
-        monkeypatch.setattr("src.server.tools.subscriptions.requests.get", fake_get)
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
 
         result = subscriptions.get_storage_subscriptions()
 
-        assert len(result) == 1
-        assert result[0]["storage_type"] == "unknown"
+        assert len(spm_urls) == 1
+        assert parse_qs(urlparse(spm_urls[0]).query)["subscription"] == ["sub-0,sub-1"]
+        assert [(s["dataset_id"], s["storage_type"]) for s in result] == [
+            ("dataset-0", "snowflake"),
+            ("dataset-1", "bigquery"),
+        ]
+
+    def test_bulk_spm_lookup_follows_pagination(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """Entries on later pages of the bulk listing are not dropped."""
+        monkeypatch.setattr(subscriptions, "SPM_BULK_LOOKUP", True)
+        pages = {
+            "1": FakeResponse(200, {
+                "data": [{"attributes": {"subscription_id": "sub-0", "data_key": "dataset_id", "data_value": "ds-0"}}],
+                "links": {"next": "https://subscriptions.api.test/spm?page=2"},
+            }),
+            "2": FakeResponse(200, {
+                "data": [{"attributes": {"subscription_id": "sub-1", "data_key": "dataset_id", "data_value": "ds-1"}}],
+                "links": {"next": None},
+            }),
+        }
+        spm_urls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            if "storages" in url:
+                return self._storages_response(2)
+            spm_urls.append(url)
+            return pages[parse_qs(urlparse(url).query).get("page", ["1"])[0]]
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert len(spm_urls) == 2
+        assert [s["dataset_id"] for s in result] == ["ds-0", "ds-1"]
+
+    @pytest.mark.parametrize(
+        "bulk_response",
+        [
+            FakeResponse(400, {}),
+            # Filter ignored: entries for a subscription that was not requested
+            FakeResponse(200, {"data": [{"attributes": {"subscription_id": "sub-9", "data_key": "dataset_id", "data_value": "x"}}]}),
+            FakeResponse(200, {"data": []}),
+        ],
+        ids=["rejected", "filter-ignored", "empty"],
+    )
+    def test_falls_back_to_per_storage_spm_when_bulk_unusable(
+        self, monkeypatch, mock_auth_headers, mock_subscriptions_api, bulk_response
+    ):
+        """When the bulk lookup cannot be trusted, each storage is looked up on its own."""
+        monkeypatch.setattr(subscriptions, "SPM_BULK_LOOKUP", True)
+        spm_urls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            if "storages" in url:
+                return self._storages_response(2)
+            spm_urls.append(url)
+            if "page_size" in url:
+                return bulk_response
+            return FakeResponse(200, {"data": [{"attributes": {"data_key": "dataset_id", "data_value": url[-5:]}}]})
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert len(spm_urls) == 3
+        assert [s["dataset_id"] for s in result] == ["sub-0", "sub-1"]
+
+    def test_looks_up_storages_missing_from_bulk_response(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """Only subscriptions absent from the bulk listing get a per-storage lookup."""
+        monkeypatch.setattr(subscriptions, "SPM_BULK_LOOKUP", True)
+        spm_urls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            if "storages" in url:
+                return self._storages_response(2)
+            spm_urls.append(url)
+            if "page_size" in url:
+                return FakeResponse(200, {
+                    "data": [{"attributes": {"subscription_id": "sub-0", "data_key": "dataset_id", "data_value": "bulk"}}],
+                })
+            return FakeResponse(200, {"data": [{"attributes": {"data_key": "dataset_id", "data_value": "single"}}]})
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert spm_urls[1:] == ["https://subscriptions.api.test/spm?subscription=sub-1"]
+        assert [s["dataset_id"] for s in result] == ["bulk", "single"]
+
+    def test_caches_storages_and_spm(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """A repeated call is served from the storages and SPM caches."""
+        calls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            calls.append(url)
+            if "storages" in url:
+                return self._storages_response(1)
+            return FakeResponse(200, {"data": [{"attributes": {"data_key": "dataset_id", "data_value": "ds"}}]})
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        first = subscriptions.get_storage_subscriptions()
+        second = subscriptions.get_storage_subscriptions()
+
+        assert first == second
+        assert first[0]["dataset_id"] == "ds"
+        assert len(calls) == 2
+
+    def test_storage_without_included_group_does_not_inherit_previous_names(self, monkeypatch, mock_auth_headers, mock_subscriptions_api):
+        """A storage with no matching included record gets no name rather than the previous one."""
+        def fake_get(url, headers=None, params=None, timeout=None):
+            if "storages" in url:
+                return FakeResponse(200, {
+                    "data": [
+                        {"id": "sub-0", "attributes": {"storage_group_id": 1}},
+                        {"id": "sub-1", "attributes": {"storage_group_id": 2}},
+                    ],
+                    "included": [{"id": "1", "attributes": {"key_name": "key-1", "name": "Storage 1"}}],
+                })
+            return FakeResponse(200, {"data": []})
+
+        monkeypatch.setattr("src.server.tools.subscriptions.get_http_session", lambda: SimpleNamespace(get=fake_get))
+
+        result = subscriptions.get_storage_subscriptions()
+
+        assert [(s["name"], s["key_name"]) for s in result] == [("Storage 1", "key-1"), (None, None)]
@@ -0,0 +1,70 @@
+import asyncio
+import stat
+
+import httpx
+
+from src.server.tools import subscriptions_openapi
+
+SCHEMA_URL = "https://subs.test/api/schema.yaml"
+SCHEMA_BODY = b"openapi: 3.0.0\ninfo:\n  title: Subs\n"
+
+
+def _use_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(subscriptions_openapi, "SCHEMA_CACHE_DIR", tmp_path / "cache")
+
+
+def test_load_spec_revalidates_cached_schema(monkeypatch, tmp_path):
+    _use_cache_dir(monkeypatch, tmp_path)
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=SCHEMA_BODY, headers={"ETag": '"v1"'})
+
+    async def load_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await subscriptions_openapi._load_spec(client, SCHEMA_URL)
+            second = await subscriptions_openapi._load_spec(client, SCHEMA_URL)
+        return first, second
+
+    first, second = asyncio.run(load_twice())
+
+    assert first == second == {"openapi": "3.0.0", "info": {"title": "Subs"}}
+    assert seen == [None, '"v1"']
+
+
+def test_load_spec_falls_back_to_cached_schema_on_network_error(monkeypatch, tmp_path):
+    _use_cache_dir(monkeypatch, tmp_path)
+    schema_path, _ = subscriptions_openapi._cache_paths(SCHEMA_URL)
+    subscriptions_openapi._write_private(schema_path, b"openapi: 3.0.0\n")
+
+    def handler(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    async def load():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await subscriptions_openapi._load_spec(client, SCHEMA_URL)
+
+    assert asyncio.run(load()) == {"openapi": "3.0.0"}
+
+
+def test_load_spec_caches_schema_privately_per_endpoint(monkeypatch, tmp_path):
+    _use_cache_dir(monkeypatch, tmp_path)
+
+    def handler(request):
+        return httpx.Response(200, content=SCHEMA_BODY, headers={"ETag": '"v1"'})
+
+    async def load():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await subscriptions_openapi._load_spec(client, SCHEMA_URL)
+
+    asyncio.run(load())
+
+    schema_path, etag_path = subscriptions_openapi._cache_paths(SCHEMA_URL)
+    assert schema_path.read_bytes() == SCHEMA_BODY
+    assert etag_path.read_text() == '"v1"'
+    assert stat.S_IMODE(schema_path.stat().st_mode) == 0o600
+    assert stat.S_IMODE(etag_path.stat().st_mode) == 0o600
+    assert subscriptions_openapi._cache_paths("https://subs.staging.test/api/schema.yaml")[0] != schema_path
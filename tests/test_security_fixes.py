@@ -1,5 +1,6 @@
 from types import SimpleNamespace
 
+import orjson
 import pytest
 
 from src.auth import simple
@@ -18,10 +19,9 @@ def test_openbridge_auth_caches_jwt(monkeypatch):
             json=lambda: {"data": {"attributes": {"token": "cached-token"}}},
         )
 
-    monkeypatch.setattr("src.auth.simple.requests.post", fake_post)
+    monkeypatch.setattr("src.auth.simple._get_session", lambda: SimpleNamespace(post=fake_post))
     monkeypatch.setattr("src.auth.simple.jwt.decode", lambda *_args, **_kwargs: {"expires_at": 3600})
     monkeypatch.setattr("src.auth.simple.time.time", lambda: 0)
-    monkeypatch.setattr("src.auth.simple._AUTH_INSTANCE", None)
 
     auth = simple.get_auth()
     assert auth.get_jwt() == "cached-token"
@@ -42,10 +42,9 @@ def test_openbridge_auth_cache_refreshes_after_expiry(monkeypatch):
 
     times = iter([4000, 4000, 4000])
 
-    monkeypatch.setattr("src.auth.simple.requests.post", fake_post)
+    monkeypatch.setattr("src.auth.simple._get_session", lambda: SimpleNamespace(post=fake_post))
     monkeypatch.setattr("src.auth.simple.jwt.decode", lambda *_args, **_kwargs: {"expires_at": 3600})
     monkeypatch.setattr("src.auth.simple.time.time", lambda: next(times))
-    monkeypatch.setattr("src.auth.simple._AUTH_INSTANCE", None)
 
     auth = simple.get_auth()
     assert auth.get_jwt() == "token-1"
@@ -91,11 +90,11 @@ def test_remote_identity_uses_timeout(monkeypatch):
         calls.append(timeout)
         return SimpleNamespace(
             status_code=200,
-            json=lambda: {"data": [], "links": {"next": None}},
+            content=orjson.dumps({"data": [], "links": {"next": None}}),
         )
 
     monkeypatch.setattr("src.server.tools.base.get_auth_headers", lambda ctx=None: headers)
-    monkeypatch.setattr("src.server.tools.remote_identity.requests.get", fake_get)
+    monkeypatch.setattr(remote_identity, "get_http_session", lambda: SimpleNamespace(get=fake_get))
 
     remote_identity.get_remote_identities()
 
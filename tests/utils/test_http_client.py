@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+
+from src.utils.http_client import AuthenticatedClient
+
+
+class _AuthManager:
+    def __init__(self, token="server.jwt"):
+        self.calls = 0
+        self.token = token
+
+    def get_headers(self):
+        self.calls += 1
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+def _send(client, url, headers):
+    async def run():
+        async with client:
+            return await client.get(url, headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_send_replaces_client_authorization_for_openbridge_hosts():
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        return httpx.Response(200)
+
+    client = AuthenticatedClient(transport=httpx.MockTransport(handler), auth_manager=_AuthManager())
+    _send(client, "https://service.api.openbridge.io/ping", {"AUTHORIZATION": "Bearer client.jwt"})
+
+    assert seen["authorization"] == "Bearer server.jwt"
+
+
+def test_send_scrubs_authorization_for_other_hosts():
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        return httpx.Response(200)
+
+    client = AuthenticatedClient(transport=httpx.MockTransport(handler), auth_manager=_AuthManager())
+    _send(client, "https://example.com/ping", {"Authorization": "Bearer client.jwt"})
+
+    assert "authorization" not in seen
+
+
+def test_auth_headers_are_reused_across_requests():
+    auth_manager = _AuthManager()
+    client = AuthenticatedClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)), auth_manager=auth_manager)
+
+    async def run():
+        async with client:
+            await asyncio.gather(*(client.get("https://service.api.openbridge.io/ping") for _ in range(3)))
+            await client.get("https://service.api.openbridge.io/ping")
+
+    asyncio.run(run())
+
+    assert auth_manager.calls == 1
+
+
+def test_auth_headers_are_refreshed_once_token_nears_expiry():
+    token = jwt.encode({"exp": int(time.time()) + 10}, "test-signing-key-that-is-long-enough", algorithm="HS256")
+    auth_manager = _AuthManager(token)
+    client = AuthenticatedClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)), auth_manager=auth_manager)
+
+    async def run():
+        async with client:
+            await client.get("https://service.api.openbridge.io/ping")
+            await client.get("https://service.api.openbridge.io/ping")
+
+    asyncio.run(run())
+
+    assert auth_manager.calls == 2
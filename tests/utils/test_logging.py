@@ -0,0 +1,43 @@
+import logging
+
+import orjson
+
+from src.utils.logging import StructuredFormatter
+
+
+def _record(msg, args=None, **extra):
+    record = logging.LogRecord("mcp_query_execution.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_structured_formatter_includes_message_and_extras():
+    formatted = orjson.loads(StructuredFormatter().format(_record("Fetched %s rows", (3,), request_id="abc", peer=object())))
+
+    assert formatted["message"] == "Fetched 3 rows"
+    assert formatted["level"] == "INFO"
+    assert formatted["timestamp"].endswith("Z")
+    assert formatted["request_id"] == "abc"
+    assert formatted["peer"].startswith("<object object")
+    assert "msg" not in formatted
+
+
+def test_structured_formatter_leaves_original_record_intact():
+    record = _record("token %s", ("Bearer abc.def.ghi",))
+
+    formatted = StructuredFormatter().format(record)
+
+    assert "abc.def.ghi" not in formatted
+    assert record.msg == "token %s"
+    assert record.args == ("Bearer abc.def.ghi",)
+
+
+def test_structured_formatter_timestamps_use_record_creation_time():
+    formatter = StructuredFormatter()
+    first = _record("first")
+    first.created = 1700000000.25
+    second = _record("second")
+    second.created = 1700000000.5
+
+    assert orjson.loads(formatter.format(first))["timestamp"] == "2023-11-14T22:13:20.250000Z"
+    assert orjson.loads(formatter.format(second))["timestamp"] == "2023-11-14T22:13:20.500000Z"